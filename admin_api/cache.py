@@ -0,0 +1,62 @@
+import threading
+from django.core.cache import caches
+from .models import Subject
+from .versions import university_versions
+
+RATING_CACHE = 'ratings'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def rating_cache():
+    return caches[RATING_CACHE]
+
+
+def generations(scope, keys):
+    """Current generation of every key of the scope, the data version of the university the key belongs to.
+
+    Versions are counters in the database bumped by every change, so a change committed by any process
+    invalidates the ratings cached by all of them, whatever the cache backend.
+    """
+    keys = set(keys)
+    if scope == 'subject':
+        universities = dict(Subject.objects.filter(pk__in=keys).values_list('pk', 'university'))
+    else:
+        universities = {key: key for key in keys}
+    versions = university_versions(universities.values())
+    return {key: '{}.{}'.format(universities.get(key), versions.get(universities.get(key), 0)) for key in keys}
+
+
+def cached_ratings(name, scope, instances, get_scope_key, compute):
+    """Values of `name` for the instances keyed by pk, computing only the ones missing from the cache.
+
+    Entries are stored under the generation of the scope key that `get_scope_key` returns for the instance,
+    `compute` receives the pks of the misses and returns their values keyed by pk.
+    """
+    if not instances:
+        return {}
+    cache = rating_cache()
+    scope_generations = generations(scope, [get_scope_key(instance) for instance in instances])
+    cache_keys = {instance.pk: 'rating:{}:{}:{}'.format(name, instance.pk,
+                                                         scope_generations[get_scope_key(instance)])
+                  for instance in instances}
+    found = cache.get_many(list(cache_keys.values()))
+    result = {pk: found[cache_key][0] for pk, cache_key in cache_keys.items() if cache_key in found}
+    missing = [pk for pk in cache_keys if pk not in result]
+    with _stats_lock:
+        _stats['hits'] += len(result)
+        _stats['misses'] += len(missing)
+    if missing:
+        computed = compute(missing)
+        cache.set_many({cache_keys[pk]: (computed.get(pk),) for pk in missing})
+        result.update({pk: computed.get(pk) for pk in missing})
+    return result
+
+
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+    return stats
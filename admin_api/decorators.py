@@ -2,6 +2,8 @@ from django.shortcuts import redirect
 from django.contrib.auth.models import AnonymousUser
 from rest_framework.response import Response
 from rest_framework import status
+from django.utils.http import parse_etags
+from .versions import current_version, version_etag
 
 
 def admin_required(view_func):
@@ -14,3 +16,25 @@ def admin_required(view_func):
             return Response('access denied', status=status.HTTP_403_FORBIDDEN)
     return wrapper
 
+
+def etag_by_version(get_university=None):
+    """Answers GET requests with 304 while the data version behind them is unchanged.
+
+    `get_university` receives the view arguments and returns the university the response depends on,
+    or None when it may depend on any data.
+    """
+    def decorator(view_func):
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+            university = get_university(request, *args, **kwargs) if get_university else None
+            etag = version_etag(request, current_version(university))
+            etags = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in etags or '*' in etags:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            response = view_func(request, *args, **kwargs)
+            if response is not None and response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,18 @@
+from drf_yasg import openapi
+
+fieldset_parameters = [
+    openapi.Parameter('fields', openapi.IN_QUERY, 'comma separated fields to return, all by default',
+                      required=False, type=openapi.TYPE_STRING),
+    openapi.Parameter('exclude', openapi.IN_QUERY, 'comma separated fields to leave out',
+                      required=False, type=openapi.TYPE_STRING),
+]
+
+
+def requested_fieldset(request):
+    """Serializer `fields`/`exclude` arguments from the query parameters of the request."""
+    fieldset = {}
+    for param in ('fields', 'exclude'):
+        value = request.GET.get(param, None)
+        if value is not None:
+            fieldset[param] = [name.strip() for name in value.split(',') if name.strip()]
+    return fieldset
@@ -0,0 +1,43 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from admin_api.models import DailyRating, Meeting, University
+from admin_api.rollups import rebuild_daily_ratings
+from admin_api.versions import bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the daily rating rollups from meeting polls, one chunk of days per transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=datetime.date.fromisoformat,
+                            help='first day to rebuild (YYYY-MM-DD), the first meeting day by default')
+        parser.add_argument('--to', dest='end', type=datetime.date.fromisoformat,
+                            help='last day to rebuild (YYYY-MM-DD), the last meeting day by default')
+        parser.add_argument('--chunk-days', type=int, default=31, help='number of days rebuilt per transaction')
+
+    def handle(self, *args, start=None, end=None, chunk_days=31, **options):
+        if chunk_days < 1:
+            raise CommandError('--chunk-days must be positive')
+        bounds = Meeting.objects.aggregate(first=Min('date'), last=Max('date'))
+        if bounds['first'] is None:
+            if start is None and end is None:
+                DailyRating.objects.all().delete()
+            self.stdout.write('no meetings to aggregate')
+            return
+        if start is None and end is None:
+            DailyRating.objects.exclude(date__range=(timezone.localdate(bounds['first']),
+                                                     timezone.localdate(bounds['last']))).delete()
+        start = start or timezone.localdate(bounds['first'])
+        end = end or timezone.localdate(bounds['last'])
+        if start > end:
+            raise CommandError('--from must not be after --to')
+
+        while start <= end:
+            chunk_end = min(start + datetime.timedelta(days=chunk_days - 1), end)
+            rebuild_daily_ratings(start=start, end=chunk_end)
+            self.stdout.write('rebuilt {} - {}'.format(start, chunk_end))
+            start = chunk_end + datetime.timedelta(days=1)
+        bump_versions(University.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS('daily ratings rebuilt'))
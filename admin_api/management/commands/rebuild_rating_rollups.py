@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from admin_api.models import University
+from admin_api.versions import bump_versions
+from admin_api.rollups import rebuild_rating_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute subject, teacher and university rating rollups from the stored poll averages'
+
+    def handle(self, *args, **options):
+        rebuild_rating_rollups()
+        bump_versions(University.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS('rating rollups rebuilt'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from admin_api.search import SEARCH_FIELDS, build_search_document
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the search documents of universities, subjects, teachers and meetings from their current names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='number of rows written per query')
+
+    def handle(self, *args, **options):
+        for model, fields in SEARCH_FIELDS.items():
+            batch = []
+            for instance in model.objects.only(*fields).order_by('pk').iterator(chunk_size=options['batch_size']):
+                instance.search_document = build_search_document(instance)
+                batch.append(instance)
+                if len(batch) == options['batch_size']:
+                    model.objects.bulk_update(batch, ['search_document'])
+                    batch = []
+            model.objects.bulk_update(batch, ['search_document'])
+            self.stdout.write('{}: search documents rebuilt'.format(model._meta.verbose_name_plural))
+        self.stdout.write(self.style.SUCCESS('search documents rebuilt'))
@@ -17,10 +17,12 @@ class CustomUser(AbstractUser):
 class University(models.Model):
     name = models.CharField(max_length=256)
     short_name = models.CharField(max_length=256, default='none')
+    search_document = models.TextField(default='', editable=False)
 
 
 class Teacher(CustomUser):
     university = models.ForeignKey(University, on_delete=models.CASCADE)
+    search_document = models.TextField(default='', editable=False)
 
 
 class Subject(models.Model):
@@ -29,6 +31,7 @@ class Subject(models.Model):
     practice_teachers = models.ManyToManyField(Teacher, related_name="practice_teachers")
     university = models.ForeignKey(University, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    search_document = models.TextField(default='', editable=False)
 
 
 class Meeting(models.Model):
@@ -42,3 +45,68 @@ class Meeting(models.Model):
     date = models.DateTimeField()
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, null=True)
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, null=True)
+    search_document = models.TextField(default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id']),
+        ]
+
+
+class RatingRollup(models.Model):
+    polls_count = models.IntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    question1_sum = models.FloatField(default=0)
+    question2_sum = models.FloatField(default=0)
+    question3_sum = models.FloatField(default=0)
+    question4_sum = models.FloatField(default=0)
+    question5_sum = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating(self):
+        if self.polls_count == 0:
+            return None
+        return self.rating_sum / self.polls_count
+
+
+class SubjectRating(RatingRollup):
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True, related_name='rating_rollup')
+
+
+class TeacherRating(RatingRollup):
+    teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE, primary_key=True, related_name='rating_rollup')
+
+
+class UniversityRating(RatingRollup):
+    university = models.OneToOneField(University, on_delete=models.CASCADE, primary_key=True,
+                                      related_name='rating_rollup')
+
+
+class DailyRating(RatingRollup):
+    date = models.DateField()
+    university = models.ForeignKey(University, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, null=True)
+    type = models.CharField(max_length=15, choices=Meeting.MEETING_TYPES)
+
+    class Meta:
+        # meetings without a teacher get a constraint of their own, NULLs never collide in a unique index
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'university', 'subject', 'teacher', 'type'],
+                                    condition=models.Q(teacher__isnull=False), name='unique_daily_rating'),
+            models.UniqueConstraint(fields=['date', 'university', 'subject', 'type'],
+                                    condition=models.Q(teacher__isnull=True), name='unique_daily_rating_no_teacher'),
+        ]
+        indexes = [
+            models.Index(fields=['university', 'date']),
+            models.Index(fields=['subject', 'date']),
+            models.Index(fields=['teacher', 'date']),
+        ]
+
+
+class DataVersion(models.Model):
+    university = models.BigIntegerField(primary_key=True)
+    version = models.BigIntegerField(default=0)
@@ -0,0 +1,31 @@
+from drf_yasg import openapi
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+pagination_parameters = [
+    openapi.Parameter('page_size', openapi.IN_QUERY, 'enables cursor pagination, number of results per page '
+                                                     '(100 by default, at most 500)',
+                      required=False, type=openapi.TYPE_INTEGER),
+    openapi.Parameter('cursor', openapi.IN_QUERY, 'enables cursor pagination, value of "next" from the previous page',
+                      required=False, type=openapi.TYPE_STRING),
+]
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = 'id'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+
+def paginated_response(request, queryset, serializer_class, ordering=None, **kwargs):
+    """Serializes the queryset as one keyset page when the request passes cursor or page_size, whole otherwise."""
+    if 'cursor' not in request.GET and 'page_size' not in request.GET:
+        return Response(serializer_class(queryset, many=True, **kwargs).data)
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True, **kwargs).data)
@@ -0,0 +1,186 @@
+import datetime
+import logging
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Meeting, SubjectRating, TeacherRating, UniversityRating, DailyRating
+
+QUESTIONS = ['question1', 'question2', 'question3', 'question4', 'question5']
+AVG_FIELDS = [question + '_avg_mark' for question in QUESTIONS]
+ROLLUP_FIELDS = ['polls_count', 'rating_sum'] + [question + '_sum' for question in QUESTIONS]
+
+logger = logging.getLogger(__name__)
+
+# rollup model, its key field and the meeting lookup that leads to it
+SCOPES = [
+    (SubjectRating, 'subject_id', 'subject'),
+    (TeacherRating, 'teacher_id', 'teacher'),
+    (UniversityRating, 'university_id', 'subject__university'),
+]
+
+
+def poll_marks(poll):
+    """Per-question averages of a poll, or None while the poll has no rating."""
+    marks = [getattr(poll, field) for field in AVG_FIELDS]
+    if not all(marks):
+        return None
+    return marks
+
+
+def _rollup_values(marks):
+    if marks is None:
+        return dict.fromkeys(ROLLUP_FIELDS, 0)
+    values = {'polls_count': 1, 'rating_sum': sum(marks) / 5}
+    for question, mark in zip(QUESTIONS, marks):
+        values[question + '_sum'] = mark
+    return values
+
+
+def _add(model, key, delta):
+    updates = {field: F(field) + value for field, value in delta.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **delta)
+    except IntegrityError:
+        model.objects.filter(**key).update(**updates)
+
+
+def day_start(date):
+    return datetime.datetime.combine(date, datetime.time.min, timezone.get_current_timezone())
+
+
+def apply_poll_change(poll_id, old_marks, new_marks):
+    """Moves the subject, teacher, university and daily rollups of a poll from its old averages to the new ones.
+
+    A rollup row is shared by every poll of its scope, the university one by the whole university, so the rows
+    are updated once the current transaction commits, in a short transaction of their own. Callers bumping data
+    versions register that after this, so no version is bumped before the rollups it covers. A failed update
+    rebuilds the rollups of the meetings instead and never fails the committed caller.
+    """
+    if old_marks == new_marks:
+        return
+    old = _rollup_values(old_marks)
+    new = _rollup_values(new_marks)
+    delta = {field: new[field] - old[field] for field in ROLLUP_FIELDS}
+
+    meetings = list(Meeting.objects.filter(poll=poll_id)
+                    .values('subject', 'teacher', 'subject__university', 'date', 'type'))
+    transaction.on_commit(lambda: _apply_to_rollups(meetings, delta), robust=True)
+
+
+def _apply_to_rollups(meetings, delta):
+    try:
+        _add_to_rollups(meetings, delta)
+    except Exception:
+        logger.exception('rollup update failed, rebuilding the rollups of meetings %s', meetings)
+        rebuild_rating_rollups(subjects={meeting['subject'] for meeting in meetings},
+                               teachers={meeting['teacher'] for meeting in meetings},
+                               universities={meeting['subject__university'] for meeting in meetings})
+        rebuild_daily_ratings(subjects={meeting['subject'] for meeting in meetings})
+
+
+@transaction.atomic
+def _add_to_rollups(meetings, delta):
+    # rows are locked in the order the rebuilds use, subject, teacher and university rollups before the daily
+    # ones, and by key within each table
+    for model, key_field, lookup in SCOPES:
+        for key in sorted(meeting[lookup] for meeting in meetings if meeting[lookup] is not None):
+            _add(model, {key_field: key}, delta)
+    days = sorted((timezone.localdate(meeting['date']), meeting['subject__university'], meeting['subject'],
+                   meeting['teacher'] or 0, meeting['type']) for meeting in meetings)
+    for date, university, subject, teacher, meeting_type in days:
+        _add(DailyRating, {'date': date, 'university_id': university, 'subject_id': subject,
+                           'teacher_id': teacher or None, 'type': meeting_type}, delta)
+
+
+def poll_rating(prefix='poll__'):
+    """Expression for the rating of a poll, the mean of its per-question averages."""
+    marks = [F(prefix + field) for field in AVG_FIELDS]
+    return sum(marks[1:], marks[0]) / 5
+
+
+def rated_meetings():
+    return Meeting.objects.filter(**{'poll__{}_avg_mark__gt'.format(question): 0 for question in QUESTIONS})
+
+
+def rollup_aggregates():
+    """Aggregates computing rollup values over rated meetings."""
+    aggregates = {'polls_count': Count('pk'), 'rating_sum': Sum(poll_rating())}
+    for question in QUESTIONS:
+        aggregates[question + '_sum'] = Sum('poll__{}_avg_mark'.format(question))
+    return aggregates
+
+
+def aggregate_ratings(meetings, lookup):
+    """Rollup values grouped by `lookup` for every rated meeting of the queryset."""
+    return (meetings.filter(**{lookup + '__isnull': False})
+            .order_by()
+            .values(lookup)
+            .annotate(**rollup_aggregates()))
+
+
+@transaction.atomic
+def rebuild_rating_rollups(subjects=None, teachers=None, universities=None):
+    """Recomputes rollups from the stored poll averages.
+
+    Each argument is an iterable of ids limiting that scope; when all of them are None every rollup is rebuilt.
+    """
+    rebuild_all = subjects is None and teachers is None and universities is None
+    for (model, key_field, lookup), ids in zip(SCOPES, (subjects, teachers, universities)):
+        if ids is None and not rebuild_all:
+            continue
+        rollups = model.objects.all()
+        meetings = rated_meetings()
+        if ids is not None:
+            ids = [pk for pk in ids if pk is not None]
+            rollups = rollups.filter(pk__in=ids)
+            meetings = meetings.filter(**{lookup + '__in': ids})
+        rollups.delete()
+        model.objects.bulk_create([
+            model(**{key_field: row.pop(lookup)}, **row) for row in aggregate_ratings(meetings, lookup)
+        ])
+
+
+@transaction.atomic
+def rebuild_daily_ratings(subjects=None, start=None, end=None):
+    """Recomputes daily rollups, optionally limited to some subjects and to the `start`-`end` dates inclusive."""
+    rollups = DailyRating.objects.all()
+    meetings = rated_meetings()
+    if subjects is not None:
+        subjects = [pk for pk in subjects if pk is not None]
+        rollups = rollups.filter(subject__in=subjects)
+        meetings = meetings.filter(subject__in=subjects)
+    if start is not None:
+        rollups = rollups.filter(date__gte=start)
+        meetings = meetings.filter(date__gte=day_start(start))
+    if end is not None:
+        rollups = rollups.filter(date__lte=end)
+        meetings = meetings.filter(date__lt=day_start(end + datetime.timedelta(days=1)))
+    rollups.delete()
+    rows = (meetings.order_by()
+            .annotate(day=TruncDate('date'))
+            .values('day', 'subject__university', 'subject', 'teacher', 'type')
+            .annotate(**rollup_aggregates()))
+    DailyRating.objects.bulk_create([
+        DailyRating(date=row.pop('day'), university_id=row.pop('subject__university'), subject_id=row.pop('subject'),
+                    teacher_id=row.pop('teacher'), type=row.pop('type'), **row)
+        for row in rows
+    ], batch_size=1000)
+
+
+def rollup_ratings(model, keys):
+    """Ratings of the given objects keyed by id, objects without rated polls are left out."""
+    rollups = model.objects.filter(pk__in=keys, polls_count__gt=0).values_list('pk', 'rating_sum', 'polls_count')
+    return {pk: rating_sum / polls_count for pk, rating_sum, polls_count in rollups}
+
+
+def average_ratings(rollups, lookup, keys):
+    """Mean rating of the rollups in every group that `lookup` leads to, skipping the ones without rated polls."""
+    rollups = (rollups.filter(**{lookup + '__in': keys}, polls_count__gt=0)
+               .order_by()
+               .values(lookup)
+               .annotate(rating=Avg(F('rating_sum') / F('polls_count'))))
+    return {row[lookup]: row['rating'] for row in rollups}
@@ -0,0 +1,112 @@
+import base64
+import json
+import logging
+import re
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Case, Q, Value, When
+from .models import University, Subject, Teacher, Meeting
+
+logger = logging.getLogger(__name__)
+
+# fields every search document is built from, in the order they are written to it
+SEARCH_FIELDS = {
+    University: ['name', 'short_name'],
+    Subject: ['name'],
+    Teacher: ['second_name', 'first_name', 'patronymic', 'username'],
+    Meeting: ['name'],
+}
+
+SEARCH_CONFIG = 'simple'
+
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+
+def search_terms(text):
+    """Lower case words of the text with ё folded into е."""
+    return re.findall(r'\w+', (text or '').lower().replace('ё', 'е'))
+
+
+def build_search_document(instance):
+    return ' '.join(term for field in SEARCH_FIELDS[type(instance)] for term in search_terms(getattr(instance, field)))
+
+
+def search_filter(queryset, text):
+    """Objects of the queryset with a word starting with every word of `text`.
+
+    PostgreSQL matches prefix queries against the full-text index made by `create_search_indexes`,
+    other databases compare the stored documents directly.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(' & '.join(term + ':*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+        return queryset.alias(search_vector=SearchVector('search_document', config=SEARCH_CONFIG)).filter(
+            search_vector=query)
+    for term in terms:
+        queryset = queryset.filter(Q(search_document__startswith=term) | Q(search_document__contains=' ' + term))
+    return queryset
+
+
+def create_search_indexes(using='default', **kwargs):
+    """Creates the PostgreSQL full-text indexes of the search documents, the expression matches `search_filter`."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    for model in SEARCH_FIELDS:
+        table = model._meta.db_table
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS {} ON {} USING gin "
+                    "(to_tsvector('{}'::regconfig, COALESCE(search_document, ''::text)))".format(
+                        connection.ops.quote_name(table + '_search_idx'), connection.ops.quote_name(table),
+                        SEARCH_CONFIG))
+        except DatabaseError:
+            logger.exception('could not create the search index of %s', table)
+
+
+def search_rank(text):
+    """Relevance of a match: 3 when the whole document is the query, 2 when it starts with the query, 1 otherwise."""
+    phrase = ' '.join(search_terms(text))
+    return Case(When(search_document=phrase, then=Value(3)),
+                When(search_document__startswith=phrase, then=Value(2)),
+                default=Value(1))
+
+
+def encode_search_cursor(instance):
+    position = [instance.search_rank, instance.search_document, instance.pk]
+    position = json.dumps(position, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, document, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if not isinstance(rank, int) or not isinstance(document, str) or not isinstance(pk, int):
+        raise ValueError('invalid cursor')
+    return rank, document, pk
+
+
+def ranked_search(queryset, text, limit, cursor=None):
+    """At most `limit` best matches of the queryset and the cursor of the ones after them, None on the last page.
+
+    Matches are ordered by rank, then by document, the cursor keeps the position of the last match returned.
+    Raises ValueError for a cursor that was not made by this function.
+    """
+    queryset = (search_filter(queryset, text)
+                .annotate(search_rank=search_rank(text))
+                .order_by('-search_rank', 'search_document', 'pk'))
+    if cursor:
+        rank, document, pk = decode_search_cursor(cursor)
+        queryset = queryset.filter(Q(search_rank__lt=rank)
+                                   | Q(search_rank=rank, search_document__gt=document)
+                                   | Q(search_rank=rank, search_document=document, pk__gt=pk))
+    matches = list(queryset[:limit + 1])
+    if len(matches) > limit:
+        return matches[:limit], encode_search_cursor(matches[limit - 1])
+    return matches, None
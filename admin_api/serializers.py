@@ -1,7 +1,53 @@
 from rest_framework import serializers
-from .models import CustomUser, University, Subject, Meeting, Teacher
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
+from .models import CustomUser, University, Subject, Meeting, Teacher, SubjectRating, TeacherRating, UniversityRating
+from .cache import cached_ratings
+from .rollups import rollup_ratings, average_ratings, AVG_FIELDS
 from polls.models import Poll
-from statistics import mean
+
+
+def group_ids(pairs):
+    """Groups (key, id) pairs into a dict of id lists."""
+    groups = {}
+    for key, pk in pairs:
+        groups.setdefault(key, []).append(pk)
+    return groups
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """Loads the computed fields of the whole list with `child.load_batch` before serializing the rows."""
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, BaseManager) else data)
+        self.child.batch = self.child.load_batch(instances)
+        try:
+            return [self.child.to_representation(item) for item in instances]
+        finally:
+            self.child.batch = None
+
+
+class BatchedModelSerializer(serializers.ModelSerializer):
+    """Model serializer limited to the `fields` or without the `exclude` field names when they are given."""
+    batch = None
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in list(self.fields):
+            if fields is not None and name not in fields or exclude is not None and name in exclude:
+                self.fields.pop(name)
+
+    def load_batch(self, instances):
+        return {}
+
+    def to_representation(self, instance):
+        if self.batch is not None:
+            return super().to_representation(instance)
+        self.batch = self.load_batch([instance])
+        try:
+            return super().to_representation(instance)
+        finally:
+            self.batch = None
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,7 +68,7 @@ class UniversitySerializer(serializers.ModelSerializer):
         fields = ['name', 'short_name']
 
 
-class UniversityGetSerializer(serializers.ModelSerializer):
+class UniversityGetSerializer(BatchedModelSerializer):
     rating = serializers.SerializerMethodField()
     teachers_rating = serializers.SerializerMethodField()
     subjects_rating = serializers.SerializerMethodField()
@@ -30,46 +76,26 @@ class UniversityGetSerializer(serializers.ModelSerializer):
     class Meta:
         model = University
         fields = ['id', 'name', 'short_name', 'rating', 'teachers_rating', 'subjects_rating']
+        list_serializer_class = BatchListSerializer
+
+    def load_batch(self, instances):
+        computations = {
+            'rating': lambda ids: rollup_ratings(UniversityRating, ids),
+            'teachers_rating': lambda ids: average_ratings(TeacherRating.objects.all(), 'teacher__university', ids),
+            'subjects_rating': lambda ids: average_ratings(SubjectRating.objects.all(), 'subject__university', ids),
+        }
+        return {name: cached_ratings('university_' + name, 'university', instances, lambda university: university.pk,
+                                     compute)
+                for name, compute in computations.items() if name in self.fields}
 
     def get_rating(self, obj):
-        subjects = Subject.objects.filter(university=obj.id).all()
-        if len(subjects) > 0:
-            subject_ids = []
-            for subject in subjects:
-                subject_ids.append(subject.pk)
-            meetings = Meeting.objects.filter(subject__in=subject_ids).all()
-            meeting_ids = []
-            for meeting in meetings:
-                meeting_ids.append(meeting.pk)
-            polls = Poll.objects.filter(pk__in=meeting_ids).all()
-            poll_ratings = polls.values('question1_avg_mark', 'question2_avg_mark', 'question3_avg_mark',
-                                        'question4_avg_mark', 'question5_avg_mark')
-            poll_ratings = list(map(lambda x: sum(x.values()) / 5 if all(x.values()) else None, poll_ratings))
-            poll_ratings = [x for x in poll_ratings if x is not None]
-            if len(poll_ratings) == 0:
-                return None
-            return mean(poll_ratings)
-        return None
+        return self.batch['rating'].get(obj.id)
 
     def get_teachers_rating(self, obj):
-        teachers = Teacher.objects.filter(university=obj.id).all()
-        if len(teachers) == 0:
-            return None
-        serializer = TeacherGetSerializer(teachers, many=True)
-        data = list(map(lambda x: x['rating'], serializer.data))
-        data = [x for x in data if x is not None]
-        if len(data) == 0:
-            return None
-        return mean(data)
+        return self.batch['teachers_rating'].get(obj.id)
 
     def get_subjects_rating(self, obj):
-        subjects = Subject.objects.filter(university=obj.id).all()
-        serializer = SubjectGetSerializer(subjects, many=True)
-        data = list(map(lambda x: x['rating'], serializer.data))
-        data = [x for x in data if x is not None]
-        if len(data) == 0:
-            return None
-        return mean(data)
+        return self.batch['subjects_rating'].get(obj.id)
 
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -78,30 +104,24 @@ class SubjectSerializer(serializers.ModelSerializer):
         fields = ['university', 'name', 'lecture_teachers', 'practice_teachers']
 
 
-class SubjectGetSerializer(serializers.ModelSerializer):
+class SubjectGetSerializer(BatchedModelSerializer):
     rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Subject
         fields = ['id', 'teachers', 'university', 'name', 'rating', 'lecture_teachers', 'practice_teachers']
+        list_serializer_class = BatchListSerializer
 
-    def get_rating(self, obj):
-        meetings = Meeting.objects.filter(subject=obj.id).all()
-        meeting_ids = []
-        for meeting in meetings:
-            meeting_ids.append(meeting.pk)
-
-        if len(meeting_ids) == 0:
-            return None
-        polls = Poll.objects.filter(pk__in=meeting_ids).all()
-        poll_ratings = polls.values('question1_avg_mark', 'question2_avg_mark', 'question3_avg_mark',
-                                    'question4_avg_mark', 'question5_avg_mark')
+    def load_batch(self, instances):
+        relations = [name for name in ('teachers', 'lecture_teachers', 'practice_teachers') if name in self.fields]
+        prefetch_related_objects(instances, *relations)
+        if 'rating' not in self.fields:
+            return {}
+        return {'rating': cached_ratings('subject', 'university', instances, lambda subject: subject.university_id,
+                                         lambda ids: rollup_ratings(SubjectRating, ids))}
 
-        poll_ratings = list(map(lambda x: sum(x.values()) / 5 if all(x.values()) else None, poll_ratings))
-        poll_ratings = [x for x in poll_ratings if x is not None]
-        if len(poll_ratings) == 0:
-            return None
-        return mean(poll_ratings)
+    def get_rating(self, obj):
+        return self.batch['rating'].get(obj.id)
 
 
 class MeetingSerializer(serializers.ModelSerializer):
@@ -115,20 +135,29 @@ class MeetingSerializer(serializers.ModelSerializer):
         fields = ['subject', 'date', 'teacher', 'type', 'name']
 
 
-class MeetingGetSerializer(serializers.ModelSerializer):
+class MeetingGetSerializer(BatchedModelSerializer):
     rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Meeting
         fields = ['id', 'name', 'subject', 'date', 'poll', 'teacher', 'type', 'rating']
+        list_serializer_class = BatchListSerializer
+
+    def load_batch(self, instances):
+        if 'rating' not in self.fields:
+            return {}
+        return {'rating': cached_ratings('meeting', 'subject', instances, lambda meeting: meeting.subject_id,
+                                         self.meeting_ratings)}
+
+    def meeting_ratings(self, ids):
+        meetings = Meeting.objects.filter(pk__in=ids).values_list('pk', *['poll__' + field for field in AVG_FIELDS])
+        ratings = {}
+        for pk, *marks in meetings:
+            ratings[pk] = sum(marks) / 5 if all(marks) else 0
+        return ratings
 
     def get_rating(self, obj):
-        poll = Poll.objects.get(pk=obj.id)
-        if all([poll.question5_avg_mark, poll.question4_avg_mark, poll.question3_avg_mark, poll.question2_avg_mark, poll.question1_avg_mark]):
-            mark = (poll.question1_avg_mark + poll.question2_avg_mark + poll.question3_avg_mark + poll.question4_avg_mark
-                    + poll.question5_avg_mark)
-            return mark / 5
-        return 0
+        return self.batch['rating'].get(obj.id, 0)
 
 
 class TeacherSerializer(serializers.ModelSerializer):
@@ -140,7 +169,7 @@ class TeacherSerializer(serializers.ModelSerializer):
         fields = ['first_name', 'second_name', 'patronymic', 'university', 'email', 'username', 'lecture_subjects', 'practice_subjects']
 
 
-class TeacherGetSerializer(serializers.ModelSerializer):
+class TeacherGetSerializer(BatchedModelSerializer):
     rating = serializers.SerializerMethodField()
     lecture_subjects = serializers.SerializerMethodField()
     practice_subjects = serializers.SerializerMethodField()
@@ -151,45 +180,74 @@ class TeacherGetSerializer(serializers.ModelSerializer):
         model = Teacher
         fields = ['id', 'first_name', 'second_name', 'patronymic', 'university', 'email', 'username', 'rating',
                   'lecture_subjects', 'practice_subjects', 'practice_meetings', 'lecture_meetings']
+        list_serializer_class = BatchListSerializer
+
+    def load_batch(self, instances):
+        ids = [teacher.pk for teacher in instances]
+        batch = {'lecture_meetings': {}, 'practice_meetings': {}}
+        if 'rating' in self.fields:
+            batch['rating'] = cached_ratings('teacher', 'university', instances, lambda teacher: teacher.university_id,
+                                             lambda ids: rollup_ratings(TeacherRating, ids))
+        if 'lecture_subjects' in self.fields:
+            batch['lecture_subjects'] = group_ids(Subject.lecture_teachers.through.objects.filter(teacher__in=ids)
+                                                  .order_by('subject').values_list('teacher', 'subject'))
+        if 'practice_subjects' in self.fields:
+            batch['practice_subjects'] = group_ids(Subject.practice_teachers.through.objects.filter(teacher__in=ids)
+                                                   .order_by('subject').values_list('teacher', 'subject'))
+        meeting_types = [meeting_type for meeting_type, _ in Meeting.MEETING_TYPES
+                         if meeting_type + '_meetings' in self.fields]
+        if meeting_types:
+            meetings = (Meeting.objects.filter(teacher__in=ids, type__in=meeting_types)
+                        .order_by('pk').values_list('teacher', 'type', 'pk'))
+            for teacher, meeting_type, meeting in meetings:
+                batch[meeting_type + '_meetings'].setdefault(teacher, []).append(meeting)
+        return batch
 
     def get_rating(self, obj):
-        meetings = Meeting.objects.filter(teacher=obj.id).all()
-        meeting_ids = []
-        for meeting in meetings:
-            meeting_ids.append(meeting.pk)
-
-        if len(meeting_ids) == 0:
-            return None
-        polls = Poll.objects.filter(pk__in=meeting_ids).all()
-        poll_ratings = polls.values('question1_avg_mark', 'question2_avg_mark', 'question3_avg_mark',
-                                    'question4_avg_mark', 'question5_avg_mark')
-        poll_ratings = list(map(lambda x: sum(x.values()) / 5 if all(x.values()) else None, poll_ratings))
-        poll_ratings = [x for x in poll_ratings if x is not None]
-        if len(poll_ratings) == 0:
-            return None
-        return mean(poll_ratings)
+        return self.batch['rating'].get(obj.id)
 
     def get_lecture_subjects(self, obj):
-        for subject in Subject.objects.filter(lecture_teachers__in=[obj.id]).all():
-            yield subject.pk
+        return self.batch['lecture_subjects'].get(obj.id, [])
 
     def get_practice_subjects(self, obj):
-        for subject in Subject.objects.filter(practice_teachers__in=[obj.id]).all():
-            yield subject.pk
+        return self.batch['practice_subjects'].get(obj.id, [])
 
     def get_lecture_meetings(self, obj):
-        for meeting in Meeting.objects.filter(teacher=obj.id, type='lecture').all():
-            yield meeting.pk
+        return self.batch['lecture_meetings'].get(obj.id, [])
 
     def get_practice_meetings(self, obj):
-        for meeting in Meeting.objects.filter(teacher=obj.id, type='practice').all():
-            yield meeting.pk
+        return self.batch['practice_meetings'].get(obj.id, [])
+
+
+class SubjectSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Subject
+        fields = ['id', 'name', 'university']
+
+
+class TeacherSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Teacher
+        fields = ['id', 'first_name', 'second_name', 'patronymic', 'university']
+
+
+class UniversitySearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = University
+        fields = ['id', 'name', 'short_name']
+
+
+class SearchCursorsSerializer(serializers.Serializer):
+    subjects = serializers.CharField(allow_null=True, required=False)
+    teachers = serializers.CharField(allow_null=True, required=False)
+    universities = serializers.CharField(allow_null=True, required=False)
 
 
 class SearchResultSerializer(serializers.Serializer):
-    subjects = serializers.ListField()
-    teachers = serializers.ListField()
-    universities = serializers.ListField()
+    subjects = SubjectSearchSerializer(many=True, required=False)
+    teachers = TeacherSearchSerializer(many=True, required=False)
+    universities = UniversitySearchSerializer(many=True, required=False)
+    next = SearchCursorsSerializer()
 
 
 class MonthSerializer(serializers.Serializer):
@@ -204,8 +262,16 @@ class MonthStatisticsSerializer(serializers.Serializer):
 
 class WeekSerializer(serializers.Serializer):
     week_number = serializers.IntegerField()
-    rating = serializers.FloatField()
+    start = serializers.DateField()
+    end = serializers.DateField()
+    rating = serializers.FloatField(allow_null=True)
 
 
 class WeekStatisticsSerializer(serializers.Serializer):
     weeks = WeekSerializer(many=True)
+
+
+class CacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_rate = serializers.FloatField(allow_null=True)
@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from polls.models import PollResult
+from .models import Meeting, Subject, Teacher, University
+from .search import build_search_document
+from .rollups import poll_marks, rebuild_rating_rollups, rebuild_daily_ratings
+from .versions import bump_versions
+
+
+def _meeting_scopes(subject_id, teacher_id):
+    university_id = Subject.objects.filter(pk=subject_id).values_list('university', flat=True).first()
+    return {subject_id}, {teacher_id}, {university_id}
+
+
+def _teacher_universities(teachers):
+    return set(Teacher.objects.filter(pk__in=[pk for pk in teachers if pk is not None])
+               .values_list('university', flat=True))
+
+
+@receiver(pre_save, sender=University)
+@receiver(pre_save, sender=Subject)
+@receiver(pre_save, sender=Teacher)
+@receiver(pre_save, sender=Meeting)
+def update_search_document(sender, instance, **kwargs):
+    instance.search_document = build_search_document(instance)
+
+
+@receiver(pre_save, sender=Meeting)
+def remember_meeting_scopes(sender, instance, **kwargs):
+    previous = Meeting.objects.filter(pk=instance.pk).values('subject', 'teacher').first() if instance.pk else None
+    instance._previous_scopes = previous
+
+
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+def refresh_meeting_rollups(sender, instance, created=False, **kwargs):
+    subjects, teachers, universities = _meeting_scopes(instance.subject_id, instance.teacher_id)
+    previous = getattr(instance, '_previous_scopes', None)
+    if previous:
+        old_subjects, old_teachers, old_universities = _meeting_scopes(previous['subject'], previous['teacher'])
+        subjects |= old_subjects
+        teachers |= old_teachers
+        universities |= old_universities
+    changes = {'versions': universities | _teacher_universities(teachers)}
+    if not (instance.poll_id is None or created and poll_marks(instance.poll) is None):
+        changes.update(subjects=subjects, teachers=teachers, universities=universities)
+    _refresh_after_commit(changes)
+
+
+def _refresh_after_commit(changes):
+    """Rebuilds the rollups of changed meetings and bumps their versions once the current transaction commits.
+
+    Every meeting changed by one transaction, e.g. all meetings of a deleted subject, shares a single rebuild.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        for _, callback, _ in connection.run_on_commit:
+            pending = getattr(callback, 'pending_changes', None)
+            if pending is not None:
+                for key, ids in changes.items():
+                    pending[key] |= ids
+                return
+
+    pending = {'subjects': set(), 'teachers': set(), 'universities': set(), 'versions': set()}
+    for key, ids in changes.items():
+        pending[key] |= ids
+
+    def refresh():
+        refresh.pending_changes = None
+        if pending['subjects'] or pending['teachers'] or pending['universities']:
+            rebuild_rating_rollups(subjects=pending['subjects'], teachers=pending['teachers'],
+                                   universities=pending['universities'])
+            rebuild_daily_ratings(subjects=pending['subjects'])
+        bump_versions(pending['versions'])
+
+    refresh.pending_changes = pending
+    transaction.on_commit(refresh, robust=True)
+
+
+@receiver(pre_save, sender=Subject)
+@receiver(pre_save, sender=Teacher)
+def remember_university(sender, instance, **kwargs):
+    previous = sender.objects.filter(pk=instance.pk).values_list('university', flat=True).first() if instance.pk else None
+    instance._previous_university = previous
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def bump_university_version(sender, instance, **kwargs):
+    universities = [instance.university_id, getattr(instance, '_previous_university', None)]
+    bump_versions(universities)
+
+
+@receiver(post_save, sender=University)
+@receiver(post_delete, sender=University)
+def bump_own_version(sender, instance, **kwargs):
+    bump_versions([instance.pk])
+
+
+@receiver(m2m_changed, sender=Subject.teachers.through)
+@receiver(m2m_changed, sender=Subject.lecture_teachers.through)
+@receiver(m2m_changed, sender=Subject.practice_teachers.through)
+def bump_subject_teachers_version(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    universities = [instance.university_id]
+    if not isinstance(instance, Subject):
+        universities += Subject.objects.filter(pk__in=pk_set or []).values_list('university', flat=True)
+    bump_versions(universities)
+
+
+def bump_poll_versions(polls):
+    """Bumps what depends on the results of the given polls, bulk writes that skip the signals call it themselves."""
+    meetings = Meeting.objects.filter(poll__in=polls).values_list('subject__university', 'teacher__university')
+    bump_versions([university for universities in meetings for university in universities])
+
+
+@receiver(post_save, sender=PollResult)
+@receiver(post_delete, sender=PollResult)
+def bump_poll_result_version(sender, instance, **kwargs):
+    bump_poll_versions([instance.poll_id])
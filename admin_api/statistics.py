@@ -0,0 +1,67 @@
+import datetime
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import DailyRating
+from .rollups import ROLLUP_FIELDS
+
+MAX_STATISTICS_MONTHS = 120
+MAX_STATISTICS_DAYS = 5 * 366
+# week ranges step a day past their end, keep the years away from datetime.MAXYEAR
+MIN_STATISTICS_YEAR = 1900
+MAX_STATISTICS_YEAR = 9998
+
+
+def add_months(date, months):
+    month = date.month - 1 + months
+    return date.replace(year=date.year + month // 12, month=month % 12 + 1)
+
+
+def rating_by(period, start, end, **filters):
+    """Average meeting rating per `period` bucket of daily rollups from `start` to `end` dates inclusive."""
+    return (DailyRating.objects
+            .filter(date__range=(start, end), polls_count__gt=0, **filters)
+            .annotate(period=period)
+            .order_by('period')
+            .values('period')
+            .annotate(rating=Sum('rating_sum') / Sum('polls_count')))
+
+
+def rollup_totals(group, start=None, end=None, **filters):
+    """ROLLUP_FIELDS sums of the daily rollups per `group` value, limited to `start` to `end` dates inclusive."""
+    rollups = DailyRating.objects.filter(**filters)
+    if start is not None:
+        rollups = rollups.filter(date__gte=start)
+    if end is not None:
+        rollups = rollups.filter(date__lte=end)
+    totals = {'total_' + field: Sum(field) for field in ROLLUP_FIELDS}
+    rows = rollups.order_by().values(group).annotate(**totals).values_list(group, *totals)
+    return {key: values for key, *values in rows}
+
+
+def month_statistics(university_id, months):
+    """Average meeting rating of the university per month, for the last `months` months, newest first."""
+    current_month = timezone.localdate().replace(day=1)
+    rows = rating_by(TruncMonth('date'), add_months(current_month, 1 - months),
+                     add_months(current_month, 1) - datetime.timedelta(days=1), university=university_id)
+    return [{'name': row['period'].strftime('%B'), 'year': str(row['period'].year), 'rating': row['rating']}
+            for row in rows.order_by('-period')]
+
+
+def week_statistics(start, end, **filters):
+    """Average meeting rating per week (weeks start on Monday) from `start` to `end` dates inclusive.
+
+    `filters` narrow the daily rollups down, e.g. to a university, subject or teacher. Weeks are clipped to the
+    range and weeks without rated meetings get a None rating.
+    """
+    ratings = {row['period']: row['rating'] for row in rating_by(TruncWeek('date'), start, end, **filters)}
+
+    weeks = []
+    current = start
+    while current <= end:
+        week_start = current - datetime.timedelta(days=current.weekday())
+        week_end = min(week_start + datetime.timedelta(days=6), end)
+        weeks.append({'week_number': len(weeks) + 1, 'start': current, 'end': week_end,
+                      'rating': ratings.get(week_start)})
+        current = week_end + datetime.timedelta(days=1)
+    return weeks
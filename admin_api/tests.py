@@ -1,3 +1,429 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .cache import rating_cache
+from polls.aggregates import create_poll_results
+from polls.models import Poll, PollResult
+from .models import CustomUser, University, Subject, Teacher, Meeting, SubjectRating, UniversityRating, DailyRating
+from .rollups import day_start, rebuild_rating_rollups
+from .statistics import add_months
+from .versions import bump_versions
 
-# Create your tests here.
+
+class AdminAPITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(username='admin', user_type='admin'))
+        self.university = University.objects.create(name='Университет', short_name='У')
+
+
+class CursorPaginationTest(AdminAPITestCase):
+    def pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_follow_the_id_order(self):
+        subjects = [Subject.objects.create(university=self.university, name='Дисциплина {}'.format(number)).pk
+                    for number in range(5)]
+
+        pages = self.pages('/admin_api/subject/?page_size=2')
+        self.assertEqual(pages, [subjects[:2], subjects[2:4], subjects[4:]])
+
+    def test_meetings_are_paged_by_date(self):
+        subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        now = timezone.now()
+        meetings = [Meeting.objects.create(subject=subject, date=now - datetime.timedelta(days=days)).pk
+                    for days in range(4)]
+
+        pages = self.pages('/admin_api/meeting/?page_size=3')
+        self.assertEqual(pages, [meetings[::-1][:3], meetings[::-1][3:]])
+
+    def test_without_page_size_the_whole_list_is_returned(self):
+        for number in range(3):
+            Subject.objects.create(university=self.university, name='Дисциплина {}'.format(number))
+
+        response = self.client.get('/admin_api/subject/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+
+class FieldsetTest(AdminAPITestCase):
+    def test_fields_limits_the_detail(self):
+        response = self.client.get('/admin_api/university/{}/?fields=id,name'.format(self.university.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': self.university.pk, 'name': 'Университет'})
+
+    def test_exclude_leaves_fields_out_of_the_list(self):
+        Subject.objects.create(university=self.university, name='Дисциплина')
+
+        response = self.client.get('/admin_api/subject/?exclude=rating, teachers,lecture_teachers')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data[0]), {'id', 'university', 'name', 'practice_teachers'})
+
+    def test_unknown_fields_are_ignored(self):
+        response = self.client.get('/admin_api/university/?fields=short_name,missing')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'short_name': 'У'}])
+
+
+class VersionETagTest(AdminAPITestCase):
+    def test_unchanged_data_answers_304(self):
+        url = '/admin_api/university/{}/'.format(self.university.pk)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_changes_of_the_university_change_the_etag(self):
+        url = '/admin_api/university/{}/'.format(self.university.pk)
+        etag = self.client.get(url)['ETag']
+        Subject.objects.create(university=self.university, name='Дисциплина')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_changes_of_other_universities_keep_the_etag(self):
+        url = '/admin_api/university/{}/'.format(self.university.pk)
+        etag = self.client.get(url)['ETag']
+        list_etag = self.client.get('/admin_api/university/')['ETag']
+        other = University.objects.create(name='Другой университет', short_name='Д')
+        Subject.objects.create(university=other, name='Дисциплина')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/admin_api/university/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+
+class RatingCacheTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        rating_cache().clear()
+
+    def test_ratings_are_cached_until_the_data_version_changes(self):
+        subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        url = '/admin_api/subject/{}/'.format(subject.pk)
+        self.assertIsNone(self.client.get(url).data['rating'])
+
+        # a rollup written by another process, which bumps the version only on commit
+        SubjectRating.objects.create(subject=subject, polls_count=2, rating_sum=9)
+        self.assertIsNone(self.client.get(url).data['rating'])
+        bump_versions([self.university.pk])
+        self.assertEqual(self.client.get(url).data['rating'], 4.5)
+
+
+class SearchDocumentTest(AdminAPITestCase):
+    def test_documents_fold_case_and_yo(self):
+        subject = Subject.objects.create(university=self.university, name='Учёт и АНАЛИЗ')
+        self.assertEqual(subject.search_document, 'учет и анализ')
+
+    def test_every_word_matches_a_word_prefix(self):
+        Subject.objects.create(university=self.university, name='Математический анализ')
+        Subject.objects.create(university=self.university, name='Анализ данных')
+        Subject.objects.create(university=self.university, name='Матанализ')
+
+        response = self.client.get('/admin_api/subject/?search=ана мат')
+        self.assertEqual([row['name'] for row in response.data], ['Математический анализ'])
+        response = self.client.get('/admin_api/subject/?search=АНАЛ')
+        self.assertEqual(sorted(row['name'] for row in response.data), ['Анализ данных', 'Математический анализ'])
+
+
+class RankedSearchTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ['Прикладная физика', 'Физика твердого тела', 'Физика', 'Ядерная физика', 'Физическая культура']:
+            Subject.objects.create(university=self.university, name=name)
+
+    def search(self, query):
+        return self.client.get('/admin_api/search/', {'type': 'subjects', **query})
+
+    def test_exact_and_leading_matches_come_first(self):
+        response = self.search({'search': 'физ'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.data['subjects']],
+                         ['Физика', 'Физика твердого тела', 'Физическая культура', 'Прикладная физика',
+                          'Ядерная физика'])
+
+        response = self.search({'search': 'физика'})
+        self.assertEqual(response.data['subjects'][0]['name'], 'Физика')
+
+    def test_cursor_continues_after_the_last_match(self):
+        names = []
+        query = {'search': 'физ', 'limit': 2}
+        while True:
+            response = self.search(query)
+            self.assertEqual(response.status_code, 200)
+            names += [row['name'] for row in response.data['subjects']]
+            if response.data['next']['subjects'] is None:
+                break
+            query['cursor'] = response.data['next']['subjects']
+        self.assertEqual(names, [row['name'] for row in self.search({'search': 'физ'}).data['subjects']])
+
+    def test_bad_cursors_and_limits_are_rejected(self):
+        self.assertEqual(self.search({'search': 'физ', 'cursor': 'not a cursor'}).status_code, 400)
+        self.assertEqual(self.search({'search': 'физ', 'cursor': 'WzEsMiwzXQ=='}).status_code, 400)
+        self.assertEqual(self.search({'search': 'физ', 'limit': 0}).status_code, 400)
+        self.assertEqual(self.search({'search': 'физ', 'limit': 51}).status_code, 400)
+        response = self.client.get('/admin_api/search/', {'search': 'физ', 'cursor': 'WzEsMiwzXQ=='})
+        self.assertEqual(response.status_code, 400)
+
+
+def rated_meeting(subject, date=None, mark=3, teacher=None):
+    poll = Poll.objects.create(**{'question{}_avg_mark'.format(number): mark for number in range(1, 6)})
+    return Meeting.objects.create(subject=subject, teacher=teacher, date=date or timezone.now(), poll=poll)
+
+
+class MeetingRollupTest(AdminAPITestCase):
+
+    def test_a_cascading_delete_rebuilds_the_rollups_once(self):
+        subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                rated_meeting(subject)
+        self.assertEqual(UniversityRating.objects.get(university=self.university).polls_count, 3)
+
+        with mock.patch('admin_api.signals.rebuild_rating_rollups', wraps=rebuild_rating_rollups) as rebuild, \
+                self.captureOnCommitCallbacks(execute=True):
+            subject.delete()
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertFalse(UniversityRating.objects.filter(university=self.university).exists())
+
+
+class ListQueryCountTest(AdminAPITestCase):
+    def add_rows(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                number = Teacher.objects.count()
+                university = University.objects.create(name='Университет {}'.format(number), short_name='У')
+                teacher = Teacher.objects.create(username='teacher{}'.format(number), university=university)
+                subject = Subject.objects.create(university=university, name='Дисциплина {}'.format(number))
+                subject.lecture_teachers.add(teacher)
+                subject.teachers.add(teacher)
+                poll = Poll.objects.create(**{'question{}_avg_mark'.format(question): 4 for question in range(1, 6)})
+                Meeting.objects.create(subject=subject, teacher=teacher, date=timezone.now(), poll=poll)
+
+    def queries(self, url):
+        rating_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url, model):
+        self.add_rows(3)
+        few = self.queries(url)
+        self.add_rows(10)
+        rating_cache().clear()
+        with self.assertNumQueries(few):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), model.objects.count())
+
+    def test_teacher_list(self):
+        self.assert_constant_queries('/admin_api/teacher/', Teacher)
+
+    def test_subject_list(self):
+        self.assert_constant_queries('/admin_api/subject/', Subject)
+
+    def test_meeting_list(self):
+        self.assert_constant_queries('/admin_api/meeting/', Meeting)
+
+    def test_university_list(self):
+        self.assert_constant_queries('/admin_api/university/', University)
+
+
+class MonthStatisticsTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        self.month = timezone.localdate().replace(day=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rated_meeting(self.subject, timezone.now(), 4)
+            rated_meeting(self.subject, day_start(add_months(self.month, -2)) + datetime.timedelta(hours=12), 2)
+            rated_meeting(self.subject, day_start(add_months(self.month, -2)) + datetime.timedelta(hours=13), 3)
+
+    def statistics(self, **query):
+        return self.client.get('/admin_api/university/{}/statistics/'.format(self.university.pk), query)
+
+    def test_months_with_ratings_newest_first(self):
+        response = self.statistics(months=3)
+        self.assertEqual(response.status_code, 200)
+        older = add_months(self.month, -2)
+        self.assertEqual(response.data['months'], [
+            {'name': self.month.strftime('%B'), 'year': str(self.month.year), 'rating': 4.0},
+            {'name': older.strftime('%B'), 'year': str(older.year), 'rating': 2.5},
+        ])
+        self.assertEqual(len(self.statistics(months=1).data['months']), 1)
+        self.assertEqual(len(self.statistics().data['months']), 2)
+
+    def test_bad_months_and_universities(self):
+        for months in ['0', '121', 'abc', '-1']:
+            self.assertEqual(self.statistics(months=months).status_code, 400)
+        response = self.client.get('/admin_api/university/{}/statistics/'.format(self.university.pk + 1000))
+        self.assertEqual(response.status_code, 404)
+
+
+class WeekStatisticsTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = Teacher.objects.create(username='teacher', university=self.university)
+        self.subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        other = Subject.objects.create(university=self.university, name='Другая дисциплина')
+        noon = day_start(datetime.date(2024, 3, 5)) + datetime.timedelta(hours=12)
+        with self.captureOnCommitCallbacks(execute=True):
+            rated_meeting(self.subject, noon, 4, teacher=self.teacher)
+            rated_meeting(other, noon, 2)
+
+    def weeks(self, url, **query):
+        response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+        return [(week['week_number'], week['start'], week['end'], week['rating']) for week in response.data['weeks']]
+
+    def test_date_ranges_are_split_into_clipped_weeks(self):
+        url = '/admin_api/university/{}/statistics/weeks/'.format(self.university.pk)
+        self.assertEqual(self.weeks(url, **{'from': '2024-03-05', 'to': '2024-03-12'}), [
+            (1, '2024-03-05', '2024-03-10', 3.0),
+            (2, '2024-03-11', '2024-03-12', None),
+        ])
+        weeks = self.weeks(url, year='2024', month='March')
+        self.assertEqual(weeks[0], (1, '2024-03-01', '2024-03-03', None))
+        self.assertEqual(weeks[1], (2, '2024-03-04', '2024-03-10', 3.0))
+        self.assertEqual(weeks[-1], (5, '2024-03-25', '2024-03-31', None))
+
+    def test_subject_and_teacher_weeks_see_their_own_meetings(self):
+        query = {'from': '2024-03-04', 'to': '2024-03-10'}
+        self.assertEqual(self.weeks('/admin_api/subject/{}/statistics/weeks/'.format(self.subject.pk), **query),
+                         [(1, '2024-03-04', '2024-03-10', 4.0)])
+        self.assertEqual(self.weeks('/admin_api/teacher/{}/statistics/weeks/'.format(self.teacher.pk), **query),
+                         [(1, '2024-03-04', '2024-03-10', 4.0)])
+
+    def test_bad_ranges_are_rejected(self):
+        url = '/admin_api/university/{}/statistics/weeks/'.format(self.university.pk)
+        for query in [{}, {'year': '2024'}, {'year': '2024', 'month': 'Mart'},
+                      {'year': '99999', 'month': 'March'}, {'year': 'abc', 'month': 'March'},
+                      {'from': '2024-03-01'}, {'from': '01.03.2024', 'to': '2024-03-02'},
+                      {'from': '2024-03-02', 'to': '2024-03-01'}, {'from': '2000-01-01', 'to': '2024-01-01'},
+                      {'from': '1899-12-01', 'to': '1899-12-31'}]:
+            self.assertEqual(self.client.get(url, query).status_code, 400, query)
+        self.assertEqual(self.client.get('/admin_api/subject/{}/statistics/weeks/'.format(self.subject.pk + 1000),
+                                         {'year': '2024', 'month': 'March'}).status_code, 404)
+        self.assertEqual(self.client.get('/admin_api/teacher/{}/statistics/weeks/'.format(self.teacher.pk + 1000),
+                                         {'year': '2024', 'month': 'March'}).status_code, 404)
+
+
+@override_settings(POLL_COUNTER_SHARDS=0)
+class DailyRatingTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        teacher = Teacher.objects.create(username='teacher', university=self.university)
+        self.subjects = [Subject.objects.create(university=self.university, name='Дисциплина {}'.format(number))
+                         for number in range(2)]
+        day = day_start(datetime.date(2024, 3, 5)) + datetime.timedelta(hours=10)
+        meetings = [(self.subjects[0], teacher, day, 'lecture'),
+                    (self.subjects[0], teacher, day + datetime.timedelta(hours=2), 'lecture'),
+                    (self.subjects[0], teacher, day, 'practice'),
+                    (self.subjects[1], None, day + datetime.timedelta(days=2), 'lecture')]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meetings = [Meeting.objects.create(subject=subject, teacher=teacher, date=date, type=meeting_type,
+                                                    poll=Poll.objects.create())
+                             for subject, teacher, date, meeting_type in meetings]
+        with self.captureOnCommitCallbacks(execute=True):
+            create_poll_results([{'poll_id': meeting.poll_id, 'student_first_name': 'Студент',
+                                  'student_second_name': '-', 'student_patronymic': '-',
+                                  **{'question{}'.format(question): (number + question + result) % 5 + 1
+                                     for question in range(1, 6)}}
+                                 for number, meeting in enumerate(self.meetings) for result in range(number + 2)])
+
+    def daily_rows(self):
+        return sorted((row.date, row.subject_id, row.teacher_id, row.type, row.polls_count, round(row.rating_sum, 6))
+                      for row in DailyRating.objects.filter(polls_count__gt=0))
+
+    def expected_rows(self):
+        days = {}
+        for meeting in Meeting.objects.all():
+            results = PollResult.objects.filter(poll=meeting.poll_id)
+            averages = [sum(getattr(result, 'question{}'.format(question)) for result in results) / len(results)
+                        for question in range(1, 6)]
+            key = (timezone.localdate(meeting.date), meeting.subject_id, meeting.teacher_id, meeting.type)
+            polls_count, rating_sum = days.get(key, (0, 0))
+            days[key] = polls_count + 1, rating_sum + sum(averages) / 5
+        return sorted(key + (polls_count, round(rating_sum, 6)) for key, (polls_count, rating_sum) in days.items())
+
+    def test_backfill_matches_the_poll_results(self):
+        self.assertEqual(self.daily_rows(), self.expected_rows())
+        self.assertEqual(len(self.daily_rows()), 3)
+
+        DailyRating.objects.all().delete()
+        call_command('rebuild_daily_ratings', '--chunk-days', '1', stdout=io.StringIO())
+        self.assertEqual(self.daily_rows(), self.expected_rows())
+
+    def test_daily_rows_follow_meeting_changes(self):
+        meeting = self.meetings[1]
+        meeting.date += datetime.timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting.save()
+        meeting = self.meetings[3]
+        meeting.subject = self.subjects[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting.save()
+
+        rows = self.daily_rows()
+        self.assertEqual(rows, self.expected_rows())
+        self.assertEqual({row[1] for row in rows}, {self.subjects[0].pk})
+        self.assertIn(datetime.date(2024, 3, 8), [row[0] for row in rows])
+
+
+class TeacherResponseTest(AdminAPITestCase):
+    def setUp(self):
+        super().setUp()
+        rating_cache().clear()
+        self.teacher = Teacher.objects.create(username='teacher', first_name='Иван', second_name='Иванов',
+                                              patronymic='Иванович', email='teacher@example.com',
+                                              university=self.university)
+        self.idle = Teacher.objects.create(username='idle', university=self.university)
+        self.subjects = [Subject.objects.create(university=self.university, name='Дисциплина {}'.format(number))
+                         for number in range(3)]
+        self.subjects[2].lecture_teachers.add(self.teacher)
+        self.subjects[0].lecture_teachers.add(self.teacher)
+        self.subjects[1].practice_teachers.add(self.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meetings = [rated_meeting(self.subjects[0], mark=3, teacher=self.teacher),
+                             rated_meeting(self.subjects[1], mark=5, teacher=self.teacher),
+                             rated_meeting(self.subjects[0], mark=4, teacher=self.teacher)]
+            self.meetings[1].type = 'practice'
+            self.meetings[1].save()
+
+    def expected(self):
+        return [
+            {'id': self.teacher.pk, 'first_name': 'Иван', 'second_name': 'Иванов', 'patronymic': 'Иванович',
+             'university': self.university.pk, 'email': 'teacher@example.com', 'username': 'teacher',
+             'rating': 4.0, 'lecture_subjects': [self.subjects[0].pk, self.subjects[2].pk],
+             'practice_subjects': [self.subjects[1].pk], 'practice_meetings': [self.meetings[1].pk],
+             'lecture_meetings': [self.meetings[0].pk, self.meetings[2].pk]},
+            {'id': self.idle.pk, 'first_name': '', 'second_name': 'Testov', 'patronymic': 'Testovich',
+             'university': self.university.pk, 'email': '', 'username': 'idle', 'rating': None,
+             'lecture_subjects': [], 'practice_subjects': [], 'practice_meetings': [], 'lecture_meetings': []},
+        ]
+
+    def test_list_and_detail_keep_their_shape(self):
+        response = self.client.get('/admin_api/teacher/')
+        self.assertEqual(response.status_code, 200)
+        teachers = sorted(response.json(), key=lambda teacher: teacher['id'])
+        self.assertEqual(teachers, self.expected())
+        self.assertEqual([list(teacher) for teacher in teachers], [list(teacher) for teacher in self.expected()])
+
+        for expected in self.expected():
+            response = self.client.get('/admin_api/teacher/{}/'.format(expected['id']))
+            self.assertEqual(list(response.json().items()), list(expected.items()))
@@ -0,0 +1,43 @@
+import hashlib
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import DataVersion
+
+
+def bump_versions(universities):
+    """Increments the data version of every given university, creating the counters on first use."""
+    for university in sorted({pk for pk in universities if pk is not None}):
+        if DataVersion.objects.filter(university=university).update(version=F('version') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(university=university, version=1)
+        except IntegrityError:
+            DataVersion.objects.filter(university=university).update(version=F('version') + 1)
+
+
+def current_version(university=None):
+    """Data version of one university or, when None, of all data (counters only grow and are never deleted)."""
+    if university is None:
+        return DataVersion.objects.aggregate(version=Sum('version'))['version'] or 0
+    return DataVersion.objects.filter(university=university).values_list('version', flat=True).first() or 0
+
+
+def university_versions(universities):
+    """Data versions of the given universities keyed by id, universities without a counter are left out."""
+    return dict(DataVersion.objects.filter(university__in={pk for pk in universities if pk is not None})
+                .values_list('university', 'version'))
+
+
+def version_etag(request, version):
+    """Strong ETag of a GET response built from the data version it was computed from."""
+    key = '{}|{}|{}|{}'.format(request.get_full_path(), request.user.pk, timezone.localdate(), version)
+    return '"{}"'.format(hashlib.sha1(key.encode()).hexdigest())
+
+
+def combined_version(universities):
+    """Version key of data spanning several universities, it changes whenever one of their counters does."""
+    universities = sorted({pk for pk in universities if pk is not None})
+    counters = university_versions(universities)
+    return '-'.join('{}.{}'.format(university, counters.get(university, 0)) for university in universities)
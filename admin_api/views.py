@@ -4,10 +4,9 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .filters import TeacherFilter
 import datetime
-from django.utils import timezone
 from calendar import monthrange
 from .serializers import *
-from .decorators import admin_required
+from .decorators import admin_required, etag_by_version
 from rest_framework import status
 from .models import CustomUser, University
 from rest_framework.authtoken.models import Token
@@ -17,6 +16,12 @@ from django.template.loader import render_to_string
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .utils import generate_password
+from .pagination import paginated_response, pagination_parameters
+from .fieldsets import requested_fieldset, fieldset_parameters
+from .cache import cache_stats
+from .search import search_filter, ranked_search, SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from .statistics import month_statistics, week_statistics, MAX_STATISTICS_MONTHS, MAX_STATISTICS_DAYS
+from .statistics import MIN_STATISTICS_YEAR, MAX_STATISTICS_YEAR
 from rest_framework.decorators import authentication_classes, permission_classes
 from rest_framework.authentication import SessionAuthentication
 from .authentication import BearerTokenAuthentication
@@ -45,6 +50,25 @@ signup_body = openapi.Schema(
 )
 
 
+def university_param(request):
+    university = request.GET.get('university', None)
+    if university and university.isdigit():
+        return int(university)
+    return None
+
+
+def subject_university(request, pk):
+    return Subject.objects.filter(pk=pk).values_list('university', flat=True).first()
+
+
+def teacher_university(request, pk):
+    return Teacher.objects.filter(pk=pk).values_list('university', flat=True).first()
+
+
+def meeting_university(request, pk):
+    return Meeting.objects.filter(pk=pk).values_list('subject__university', flat=True).first()
+
+
 @swagger_auto_schema(request_body=login_body,
                      methods=['post'],
                      responses={
@@ -106,7 +130,7 @@ def check_token(request):
 @swagger_auto_schema(method='get', manual_parameters=[
     openapi.Parameter('search', openapi.IN_QUERY, 'field for search by name or short name', required=False,
                       type=openapi.TYPE_STRING),
-], responses={
+] + pagination_parameters + fieldset_parameters, responses={
     200: UniversityGetSerializer.many_init(),
     400: 'bad request'
 })
@@ -114,6 +138,7 @@ def check_token(request):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version()
 def university_crud(request):
     if request.method == "POST":
         serializer = UniversitySerializer(data=request.data)
@@ -128,15 +153,12 @@ def university_crud(request):
 
         search = request.GET.get('search', None)
         if search:
-            search = search.lower()
-            data = data.filter(name__icontains=search) | data.filter(short_name__icontains=search)
+            data = search_filter(data, search)
 
-        serializer = UniversityGetSerializer(data, many=True)
-
-        return Response(serializer.data)
+        return paginated_response(request, data, UniversityGetSerializer, **requested_fieldset(request))
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     404: 'not found',
     200: UniversityGetSerializer
 })
@@ -154,6 +176,7 @@ def university_crud(request):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(lambda request, pk: pk)
 def university_detail(request, pk):
     try:
         university = University.objects.get(pk=pk)
@@ -161,7 +184,7 @@ def university_detail(request, pk):
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        serializer = UniversityGetSerializer(university)
+        serializer = UniversityGetSerializer(university, **requested_fieldset(request))
         return Response(serializer.data)
 
     elif request.method == 'PUT':
@@ -178,99 +201,137 @@ def university_detail(request, pk):
 @swagger_auto_schema(method='get', responses={
     404: 'not found',
     200: MonthStatisticsSerializer
-}, operation_description='get institute statistics by months')
+}, operation_description='get institute statistics by months',
+                     manual_parameters=[
+                         openapi.Parameter('months', openapi.IN_QUERY, 'number of months to return, 12 by default',
+                                           required=False,
+                                           type=openapi.TYPE_INTEGER),
+                     ])
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(lambda request, pk: pk)
 def university_month_statistics(request, pk):
-    try:
-        university = University.objects.get(pk=pk)
-    except University.DoesNotExist:
+    if not University.objects.filter(pk=pk).exists():
         return Response("not found", status=status.HTTP_404_NOT_FOUND)
 
-    subjects = Subject.objects.filter(university=university.pk).all()
-    subjects = [subject.pk for subject in subjects]
-    data = {'months': []}
-    current_datetime = timezone.now()
-
-    for month in range(12):
-        month_range = monthrange(current_datetime.year, current_datetime.month)
-        datetime_max = current_datetime.replace(day=month_range[1])
-        datetime_min = current_datetime.replace(day=1)
-        month_meetings = Meeting.objects.filter(date__range=(datetime_min, datetime_max), subject__in=subjects).all()
-        meetings_serializer = MeetingGetSerializer(month_meetings, many=True)
-        month_ratings = [meeting['rating'] for meeting in meetings_serializer.data if meeting['rating'] > 0]
-        if len(month_ratings) > 0:
-            data['months'].append({"name": current_datetime.strftime("%B"),
-                                   "rating": sum(month_ratings) / len(month_ratings),
-                                   "year": str(current_datetime.year)})
-
-        current_datetime = datetime_min - timezone.timedelta(days=1)
+    months = request.GET.get('months', '12')
+    if not months.isdigit() or not 1 <= int(months) <= MAX_STATISTICS_MONTHS:
+        return Response("bad request: months must be between 1 and {}".format(MAX_STATISTICS_MONTHS),
+                        status=status.HTTP_400_BAD_REQUEST)
 
+    data = {'months': month_statistics(pk, int(months))}
     serializer = MonthStatisticsSerializer(data=data)
     if serializer.is_valid():
         return Response(serializer.data)
 
 
+week_statistics_parameters = [
+    openapi.Parameter('year', openapi.IN_QUERY, 'needed year, used together with month',
+                      required=False,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('month', openapi.IN_QUERY, 'needed month (January, February, etc)',
+                      required=False,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('from', openapi.IN_QUERY, 'first day of the range (YYYY-MM-DD), used instead of year and month',
+                      required=False,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('to', openapi.IN_QUERY, 'last day of the range (YYYY-MM-DD), used together with from',
+                      required=False,
+                      type=openapi.TYPE_STRING),
+]
+
+
+def get_week_range(request):
+    """Returns the (start, end) dates requested either by from/to or by year/month, or an error response."""
+    date_from = request.GET.get('from', None)
+    date_to = request.GET.get('to', None)
+    if date_from is not None or date_to is not None:
+        try:
+            start = datetime.date.fromisoformat(date_from or '')
+            end = datetime.date.fromisoformat(date_to or '')
+        except ValueError:
+            return None, Response("bad request: from and to must be dates in YYYY-MM-DD format",
+                                  status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days > MAX_STATISTICS_DAYS:
+            return None, Response("bad request: from must not be after to and the range must not exceed {} days"
+                                  .format(MAX_STATISTICS_DAYS), status=status.HTTP_400_BAD_REQUEST)
+        if start.year < MIN_STATISTICS_YEAR or end.year > MAX_STATISTICS_YEAR:
+            return None, Response("bad request: from and to must be in the years {} to {}"
+                                  .format(MIN_STATISTICS_YEAR, MAX_STATISTICS_YEAR),
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return (start, end), None
+
+    month = request.GET.get('month', None)
+    year = request.GET.get('year', None)
+    if year is None or month is None:
+        return None, Response("bad request: year and month or from and to are not specified",
+                              status=status.HTTP_400_BAD_REQUEST)
+    if month in calendar.month_name[1:]:
+        month_number = list(calendar.month_name).index(month)
+    else:
+        return None, Response("bad request: wrong month name", status=status.HTTP_400_BAD_REQUEST)
+
+    if not year.isdigit() or not MIN_STATISTICS_YEAR <= int(year) <= MAX_STATISTICS_YEAR:
+        return None, Response("bad request: wrong year", status=status.HTTP_400_BAD_REQUEST)
+
+    year = int(year)
+    return (datetime.date(year, month_number, 1), datetime.date(year, month_number, monthrange(year, month_number)[1])), None
+
+
+def week_statistics_response(request, **filters):
+    week_range, error = get_week_range(request)
+    if error is not None:
+        return error
+    serializer = WeekStatisticsSerializer({'weeks': week_statistics(*week_range, **filters)})
+    return Response(serializer.data)
+
+
 @swagger_auto_schema(method='get', responses={
     404: 'not found',
     200: WeekStatisticsSerializer
-}, operation_description='get institute statistics by weeks in month',
-                     manual_parameters=[
-                         openapi.Parameter('year', openapi.IN_QUERY, 'needed year',
-                                           required=True,
-                                           type=openapi.TYPE_STRING),
-                         openapi.Parameter('month', openapi.IN_QUERY, 'needed month (January, February, etc)',
-                                           required=True,
-                                           type=openapi.TYPE_STRING),
-                     ])
+}, operation_description='get institute statistics by weeks in month or in a date range',
+                     manual_parameters=week_statistics_parameters)
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(lambda request, pk: pk)
 def university_weeks_in_month_statistics(request, pk):
-    month = request.GET.get('month', None)
-    year = request.GET.get('year', None)
-    university = pk
-    if year is None or month is None or university is None:
-        return Response("bad request: year or month or university is not specified",
-                        status=status.HTTP_400_BAD_REQUEST)
-    if month in calendar.month_name:
-        month_number = list(calendar.month_name).index(month)
-    else:
-        return Response("bad request: wrong month name", status=status.HTTP_400_BAD_REQUEST)
+    return week_statistics_response(request, university=pk)
 
-    if not year.isdigit():
-        return Response("bad request: wrong year", status=status.HTTP_400_BAD_REQUEST)
 
-    start_datetime = timezone.datetime(year=int(year), month=month_number, day=1)
-    if month_number == 12:
-        end_datetime = timezone.datetime(year=int(year) + 1, month=1, day=1)
-    else:
-        end_datetime = timezone.datetime(year=int(year), month=month_number + 1, day=1)
-
-    current = start_datetime
-    data = {"weeks": []}
-    subjects = Subject.objects.filter(university=university).all()
-    subjects = [subject.pk for subject in subjects]
-    week_number = 1
-    while current < end_datetime:
-        week_end = current + timezone.timedelta(days=6 - current.weekday())
-        if week_end >= end_datetime:
-            week_end = end_datetime - timezone.timedelta(days=1)
-        week_meetings = Meeting.objects.filter(date__range=(current, week_end), subject__in=subjects).all()
-        meetings_serializer = MeetingGetSerializer(week_meetings, many=True)
-        week_ratings = [meeting['rating'] for meeting in meetings_serializer.data if meeting['rating'] > 0]
-        if len(week_ratings) > 0:
-            data['weeks'].append({"week_number": week_number,
-                                  "rating": sum(week_ratings) / len(week_ratings)})
-        else:
-            data['weeks'].append({"week_number": week_number, "rating": None})
-        week_number += 1
-        current = week_end + timezone.timedelta(days=1)
+@swagger_auto_schema(method='get', responses={
+    404: 'not found',
+    200: WeekStatisticsSerializer
+}, operation_description='get subject statistics by weeks in month or in a date range',
+                     manual_parameters=week_statistics_parameters)
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BearerTokenAuthentication])
+@permission_classes([IsAuthenticated])
+@admin_required
+@etag_by_version(subject_university)
+def subject_weeks_statistics(request, pk):
+    if not Subject.objects.filter(pk=pk).exists():
+        return Response("not found", status=status.HTTP_404_NOT_FOUND)
+    return week_statistics_response(request, subject=pk)
 
-    return Response(data)
+
+@swagger_auto_schema(method='get', responses={
+    404: 'not found',
+    200: WeekStatisticsSerializer
+}, operation_description='get teacher statistics by weeks in month or in a date range',
+                     manual_parameters=week_statistics_parameters)
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BearerTokenAuthentication])
+@permission_classes([IsAuthenticated])
+@admin_required
+@etag_by_version(teacher_university)
+def teacher_weeks_statistics(request, pk):
+    if not Teacher.objects.filter(pk=pk).exists():
+        return Response("not found", status=status.HTTP_404_NOT_FOUND)
+    return week_statistics_response(request, teacher=pk)
 
 
 @swagger_auto_schema(method='post', request_body=SubjectSerializer,
@@ -285,7 +346,7 @@ def university_weeks_in_month_statistics(request, pk):
                       type=openapi.TYPE_INTEGER),
     openapi.Parameter('university', openapi.IN_QUERY, 'field for filtering by university id',
                       required=False, type=openapi.TYPE_INTEGER)
-], responses={
+] + pagination_parameters + fieldset_parameters, responses={
     200: SubjectGetSerializer.many_init(),
     400: 'bad request'
 })
@@ -293,6 +354,7 @@ def university_weeks_in_month_statistics(request, pk):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(university_param)
 def subject_crud(request):
     if request.method == 'POST':
         serializer = SubjectSerializer(data=request.data)
@@ -313,16 +375,13 @@ def subject_crud(request):
             data = data.filter(university__id=university)
         search = request.GET.get('search', None)
         if search:
-            search = search.lower()
-            data = data.filter(name__icontains=search)
+            data = search_filter(data, search)
 
         data = data.distinct()
-        serializer = SubjectGetSerializer(data, many=True)
+        return paginated_response(request, data, SubjectGetSerializer, **requested_fieldset(request))
 
-        return Response(serializer.data)
 
-
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: SubjectGetSerializer,
     404: 'not found'
 })
@@ -340,6 +399,7 @@ def subject_crud(request):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(subject_university)
 def subject_detail(request, pk):
     try:
         subject = Subject.objects.get(pk=pk)
@@ -347,7 +407,7 @@ def subject_detail(request, pk):
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        serializer = SubjectGetSerializer(subject)
+        serializer = SubjectGetSerializer(subject, **requested_fieldset(request))
         return Response(serializer.data)
 
     elif request.method == 'PUT':
@@ -435,7 +495,7 @@ def subject_teacher_operations_practice(request, pk, teacher_id):
                       type=openapi.TYPE_STRING),
     openapi.Parameter('search', openapi.IN_QUERY, 'field for searching by name', required=False,
                       type=openapi.TYPE_STRING)
-], responses={
+] + pagination_parameters + fieldset_parameters, responses={
     200: MeetingGetSerializer.many_init(),
     400: 'bad request'
 })
@@ -443,6 +503,7 @@ def subject_teacher_operations_practice(request, pk, teacher_id):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version()
 def meeting_crud(request):
     if request.method == 'POST':
         serializer = MeetingSerializer(data=request.data)
@@ -466,14 +527,12 @@ def meeting_crud(request):
 
         search = request.GET.get('search', None)
         if search:
-            search = search.lower()
-            data = data.filter(name__icontains=search)
-        serializer = MeetingGetSerializer(data, many=True)
-
-        return Response(serializer.data)
+            data = search_filter(data, search)
+        return paginated_response(request, data, MeetingGetSerializer, ordering=('date', 'id'),
+                                  **requested_fieldset(request))
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: MeetingGetSerializer,
     404: 'not found'
 })
@@ -490,6 +549,7 @@ def meeting_crud(request):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(meeting_university)
 def meeting_detail(request, pk):
     try:
         meeting = Meeting.objects.get(pk=pk)
@@ -498,7 +558,7 @@ def meeting_detail(request, pk):
 
     if request.method == 'GET':
 
-        serializer = MeetingGetSerializer(meeting)
+        serializer = MeetingGetSerializer(meeting, **requested_fieldset(request))
         return Response(serializer.data)
 
     elif request.method == 'PUT':
@@ -512,32 +572,56 @@ def meeting_detail(request, pk):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+search_types = {
+    'subjects': (Subject, SubjectSearchSerializer),
+    'teachers': (Teacher, TeacherSearchSerializer),
+    'universities': (University, UniversitySearchSerializer),
+}
+
+
 @swagger_auto_schema(method='get', manual_parameters=[
     openapi.Parameter('search', openapi.IN_QUERY, 'field for search', required=False,
-                      type=openapi.TYPE_STRING)
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('type', openapi.IN_QUERY, 'return only this type of results', required=False,
+                      type=openapi.TYPE_STRING, enum=list(search_types)),
+    openapi.Parameter('limit', openapi.IN_QUERY, 'number of results of every type ({} by default, at most {})'
+                      .format(SEARCH_LIMIT, MAX_SEARCH_LIMIT), required=False, type=openapi.TYPE_INTEGER),
+    openapi.Parameter('cursor', openapi.IN_QUERY, 'value of "next" for the type from the previous response, '
+                                                  'requires type', required=False, type=openapi.TYPE_STRING),
 ], responses={
     200: SearchResultSerializer,
     400: 'bad request'
-}, operation_description="search for all entities")
+}, operation_description="search for all entities, best matches of every type first")
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version()
 def search_all(request):
     search = request.GET.get('search', None)
     if search:
-        search = search.lower()
-        subjects = Subject.objects.filter(name__icontains=search)
-        teachers = Teacher.objects.filter((Q(first_name__icontains=search) | Q(second_name__icontains=search)
-                                           | Q(patronymic__icontains=search)
-                                           | Q(username__icontains=search)))
-        universities = University.objects.filter(name__icontains=search)
-
-        results = {
-            "subjects": list(subjects.values()),
-            "teachers": list(teachers.values()),
-            "universities": list(universities.values())
-        }
+        result_type = request.GET.get('type', None)
+        if result_type is not None and result_type not in search_types:
+            return Response("bad request: type must be one of {}".format(', '.join(search_types)),
+                            status=status.HTTP_400_BAD_REQUEST)
+        cursor = request.GET.get('cursor', None)
+        if cursor and result_type is None:
+            return Response("bad request: cursor requires type", status=status.HTTP_400_BAD_REQUEST)
+        limit = request.GET.get('limit', str(SEARCH_LIMIT))
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_SEARCH_LIMIT:
+            return Response("bad request: limit must be between 1 and {}".format(MAX_SEARCH_LIMIT),
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = {"next": {}}
+        for name, (model, serializer_class) in search_types.items():
+            if result_type is not None and name != result_type:
+                continue
+            queryset = model.objects.only(*serializer_class.Meta.fields, 'search_document')
+            try:
+                matches, results["next"][name] = ranked_search(queryset, search, int(limit), cursor)
+            except ValueError:
+                return Response("bad request: invalid cursor", status=status.HTTP_400_BAD_REQUEST)
+            results[name] = serializer_class(matches, many=True).data
 
         return Response(results, status=status.HTTP_200_OK)
 
@@ -552,7 +636,7 @@ def search_all(request):
                       type=openapi.TYPE_STRING),
     openapi.Parameter('subject', openapi.IN_QUERY, 'field for filtering by subject id', required=False,
                       type=openapi.TYPE_STRING)
-], responses={
+] + pagination_parameters + fieldset_parameters, responses={
     200: 'result',
     400: 'bad request'
 })
@@ -560,6 +644,7 @@ def search_all(request):
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @admin_required
+@etag_by_version(university_param)
 def teacher_crud(request):
     if request.method == 'POST':
         serializer = TeacherSerializer(data=request.data)
@@ -609,10 +694,7 @@ def teacher_crud(request):
         search = request.GET.get('search', None)
         university = request.GET.get('university', None)
         if search:
-            search = search.lower()
-            data = data.filter((Q(first_name__icontains=search) | Q(second_name__icontains=search)
-                                | Q(patronymic__icontains=search)
-                                | Q(username__icontains=search)))
+            data = search_filter(data, search)
         if subject_id:
             try:
                 if university:
@@ -626,21 +708,16 @@ def teacher_crud(request):
             teachers = Teacher.objects.filter(
                 Q(pk__in=lecture_teachers) | Q(pk__in=practice_teachers)).all()
             if search:
-                search = search.lower()
-                teachers = teachers.filter((Q(first_name__icontains=search) | Q(second_name__icontains=search)
-                                    | Q(patronymic__icontains=search)
-                                    | Q(username__icontains=search)))
-            serializer = TeacherGetSerializer(teachers, many=True)
-            return Response(serializer.data)
+                teachers = search_filter(teachers, search)
+            return paginated_response(request, teachers, TeacherGetSerializer, **requested_fieldset(request))
 
         if university:
             data = data.filter(university=university)
 
-        serializer = TeacherGetSerializer(data, many=True)
-        return Response(serializer.data)
+        return paginated_response(request, data, TeacherGetSerializer, **requested_fieldset(request))
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: TeacherGetSerializer,
     404: 'not found'
 })
@@ -655,6 +732,7 @@ def teacher_crud(request):
 })
 @api_view(['GET', 'PUT', 'DELETE'])
 @authentication_classes([SessionAuthentication, BearerTokenAuthentication])
+@etag_by_version(teacher_university)
 def teacher_detail(request, pk):
     try:
         teacher = Teacher.objects.get(pk=pk)
@@ -663,7 +741,7 @@ def teacher_detail(request, pk):
 
     if request.method == 'GET':
 
-        serializer = TeacherGetSerializer(teacher)
+        serializer = TeacherGetSerializer(teacher, **requested_fieldset(request))
         return Response(serializer.data)
 
     elif request.method == 'PUT':
@@ -697,3 +775,14 @@ def teacher_detail(request, pk):
     elif request.method == 'DELETE':
         teacher.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@swagger_auto_schema(method='get', responses={
+    200: CacheStatsSerializer,
+}, operation_description="rating cache hits and misses of this worker process since it started")
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BearerTokenAuthentication])
+@permission_classes([IsAuthenticated])
+@admin_required
+def rating_cache_stats(request):
+    return Response(CacheStatsSerializer(cache_stats()).data, status=status.HTTP_200_OK)
@@ -0,0 +1,35 @@
+import io
+from django.conf import settings
+from django.core.cache import caches
+from admin_api.versions import combined_version
+from .engine import render
+from .export import save_workbook
+from .reports import REPORTS, REPORT_UNIVERSITIES
+
+REPORT_CACHE = 'reports'
+
+
+def report_file(report, object_id, start=None, end=None):
+    """Open file with the report, read from the report cache while the data it was built from stays unchanged.
+
+    Cached reports keep the generation time they were built with. Returns None when the report has no rows,
+    a missing object raises its DoesNotExist.
+    """
+    cache = caches[REPORT_CACHE]
+    key = 'report:{}:{}:{}:{}:{}'.format(report, object_id, start or '', end or '',
+                                         combined_version(REPORT_UNIVERSITIES[report](object_id)))
+    content = cache.get(key)
+    if content is not None:
+        return io.BytesIO(content) if content else None
+
+    definition = REPORTS[report](object_id, start, end)
+    if definition is None:
+        cache.set(key, b'')
+        return None
+    file = save_workbook(render(definition))
+    file.seek(0, 2)
+    if file.tell() <= settings.REPORT_CACHE_MAX_SIZE:
+        file.seek(0)
+        cache.set(key, file.read())
+    file.seek(0)
+    return file
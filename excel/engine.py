@@ -0,0 +1,120 @@
+from datetime import datetime
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, NamedStyle
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.utils import get_column_letter
+
+_bottom_left = Alignment(horizontal="left", vertical="bottom")
+
+# named styles of every report by key, the definitions are built once per process and registered in each workbook
+STYLES = {
+    'header': dict(name="Заголовок документа", number_format="General",
+                   font=Font(name='Times New Roman', bold=True, size=24), alignment=_bottom_left),
+    'general': dict(name="Общий", number_format="General",
+                    font=Font(name='Times New Roman', bold=False, size=12), alignment=_bottom_left),
+    'tableheader': dict(name="Заголовок таблицы", number_format="General",
+                        font=Font(name='Times New Roman', bold=True, size=12), alignment=_bottom_left),
+    'number': dict(name="Числа", number_format="0.0",
+                   font=Font(name='Times New Roman', bold=False, size=12), alignment=_bottom_left),
+    'comment': dict(name="Комментарий", number_format="General",
+                    font=Font(name='Times New Roman', bold=False, size=10),
+                    alignment=Alignment(horizontal="left", vertical="bottom", wrap_text=True)),
+}
+
+TITLE_HEIGHT = 30
+
+
+class Column:
+    def __init__(self, title, style='general', width=None):
+        self.title = title
+        self.style = style
+        self.width = width
+
+
+class Table:
+    """Header row with the column titles followed by `rows`, an iterable of value sequences in column order."""
+
+    def __init__(self, columns, rows, auto_filter=True, row_height=None):
+        self.columns = columns
+        self.rows = rows
+        self.auto_filter = auto_filter
+        self.row_height = row_height
+
+
+class Report:
+    """Title, metadata lines ending with the generation time and the tables, each one after an empty row."""
+
+    def __init__(self, title, tables, meta=(), meta_style='general', sheet_title=None):
+        self.title = title
+        self.tables = tables
+        self.meta = meta
+        self.meta_style = meta_style
+        self.sheet_title = sheet_title
+
+
+def _register_styles(workbook, sheet):
+    """Adds the named styles to the workbook and returns a style template of each of them by key."""
+    styles = {}
+    for key, definition in STYLES.items():
+        workbook.add_named_style(NamedStyle(**definition))
+        cell = WriteOnlyCell(sheet, None)
+        cell.style = definition['name']
+        styles[key] = cell._style
+    return styles
+
+
+class _SheetWriter:
+    def __init__(self, sheet, styles):
+        self.sheet = sheet
+        self.row = 0
+        self.styles = styles
+
+    def append(self, values, styles, height=None):
+        self.row += 1
+        if height is not None:
+            self.sheet.row_dimensions[self.row].height = height
+        cells = []
+        for value, style in zip(values, styles):
+            cell = WriteOnlyCell(self.sheet, value)
+            cell._style = StyleArray(self.styles[style])
+            cells.append(cell)
+        self.sheet.append(cells)
+
+
+def _write_report(writer, report):
+    sheet = writer.sheet
+
+    widths = {}
+    for table in report.tables:
+        for index, column in enumerate(table.columns, 1):
+            if column.width is not None:
+                widths[index] = max(widths.get(index, 0), column.width)
+    for index, width in widths.items():
+        sheet.column_dimensions[get_column_letter(index)].width = width
+
+    writer.append([report.title], ['header'], height=TITLE_HEIGHT)
+    generated = 'Дата и время обращения: ' + datetime.now().strftime("%d.%m.%Y %H:%M")
+    for line in list(report.meta) + [generated]:
+        writer.append([line], [report.meta_style])
+
+    for table in report.tables:
+        writer.append([], [])
+        header_row = writer.row + 1
+        writer.append([column.title for column in table.columns], ['tableheader'] * len(table.columns))
+        styles = [column.style for column in table.columns]
+        for row in table.rows:
+            writer.append(row, styles, height=table.row_height)
+        if table.auto_filter:
+            sheet.auto_filter.ref = 'A{}:{}{}'.format(header_row, get_column_letter(len(table.columns)), writer.row)
+
+
+def render(report):
+    """Write-only workbook with the report, or with one sheet per report when given a list of them."""
+    reports = [report] if isinstance(report, Report) else report
+    workbook = Workbook(write_only=True)
+    sheets = [workbook.create_sheet(report.sheet_title) for report in reports]
+    styles = _register_styles(workbook, sheets[0])
+    for sheet, report in zip(sheets, reports):
+        _write_report(_SheetWriter(sheet, styles), report)
+    return workbook
@@ -0,0 +1,41 @@
+import tempfile
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPE = 'application/vnd.ms-excel'
+# workbooks stay in memory up to this size and are moved to a temporary file past it
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def save_workbook(workbook):
+    """Saves the workbook into a spooled temporary file and returns it rewound, the caller closes it."""
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        workbook.save(file)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file
+
+
+def read_chunks(file):
+    try:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_response(file, filename='export.xlsx'):
+    """Streams an open file object back as an attachment and closes it afterwards."""
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(0)
+    return StreamingHttpResponse(read_chunks(file), content_type=CONTENT_TYPE,
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"',
+                                          "Content-Length": str(size)})
+
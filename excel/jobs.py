@@ -0,0 +1,78 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files import File
+from django.db import connections, transaction
+from django.utils import timezone
+from .cache import report_file
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def export_executor():
+    """Process wide pool of threads building the reports of export jobs."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix='export')
+        return _executor
+
+
+def export_expiry():
+    return timezone.now() + timedelta(seconds=settings.EXPORT_TTL)
+
+
+def create_export_job(user, report, object_id, start=None, end=None):
+    """Saves a pending job and hands it to the pool once the current transaction commits."""
+    expire_export_jobs()
+    job = ExportJob.objects.create(user=user, report=report, object_id=object_id, start=start, end=end,
+                                   expires_at=export_expiry())
+    transaction.on_commit(lambda: export_executor().submit(run_export_job, job.pk))
+    return job
+
+
+def _finish(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.expires_at = export_expiry()
+    job.save(update_fields=['status', 'error', 'file', 'finished_at', 'expires_at'])
+
+
+def run_export_job(job_id):
+    try:
+        if not ExportJob.objects.filter(pk=job_id, status='pending').update(status='running'):
+            return
+        job = ExportJob.objects.get(pk=job_id)
+        try:
+            file = report_file(job.report, job.object_id, job.start, job.end)
+        except ObjectDoesNotExist:
+            _finish(job, 'failed', 'not found')
+            return
+        if file is None:
+            _finish(job, 'empty')
+            return
+        with file:
+            job.file.save('{}.xlsx'.format(job.pk), File(file), save=False)
+        _finish(job, 'done')
+    except Exception:
+        logger.exception('export job %s failed', job_id)
+        ExportJob.objects.filter(pk=job_id).update(status='failed', error='internal error',
+                                                   finished_at=timezone.now())
+    finally:
+        connections.close_all()
+
+
+def expire_export_jobs():
+    """Deletes the jobs past their expiry time together with their files."""
+    for job in ExportJob.objects.filter(expires_at__lt=timezone.now()):
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from excel.jobs import expire_export_jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete export jobs and files past their expiry time'
+
+    def handle(self, *args, **options):
+        expire_export_jobs()
+        self.stdout.write(self.style.SUCCESS('expired export jobs deleted'))
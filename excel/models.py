@@ -1,3 +1,32 @@
+import uuid
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from admin_api.models import CustomUser
 
-# Create your models here.
+
+def export_storage():
+    return FileSystemStorage(location=settings.EXPORT_ROOT)
+
+
+class ExportJob(models.Model):
+    STATUSES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('empty', 'Empty'),
+        ('failed', 'Failed')
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    report = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    start = models.DateField(null=True)
+    end = models.DateField(null=True)
+    status = models.CharField(max_length=15, choices=STATUSES, default='pending')
+    error = models.CharField(max_length=256, null=True)
+    file = models.FileField(storage=export_storage, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,98 @@
+import csv
+import datetime
+import io
+import json
+from polls.models import PollResult
+from .export import CHUNK_SIZE
+from .reports import date_filters
+
+# rows fetched per round trip of the server-side cursor
+ITERATOR_CHUNK_SIZE = 2000
+
+# output column name and the PollResult lookup it is read from
+RAW_COLUMNS = [
+    ('poll_result_id', 'id'),
+    ('poll_id', 'poll_id'),
+    ('meeting_id', 'poll__meeting__id'),
+    ('meeting_date', 'poll__meeting__date'),
+    ('meeting_type', 'poll__meeting__type'),
+    ('subject_id', 'poll__meeting__subject_id'),
+    ('subject_name', 'poll__meeting__subject__name'),
+    ('teacher_id', 'poll__meeting__teacher_id'),
+    ('teacher_second_name', 'poll__meeting__teacher__second_name'),
+    ('teacher_first_name', 'poll__meeting__teacher__first_name'),
+    ('teacher_patronymic', 'poll__meeting__teacher__patronymic'),
+    ('university_id', 'poll__meeting__subject__university_id'),
+    ('university_name', 'poll__meeting__subject__university__name'),
+    ('student_second_name', 'student_second_name'),
+    ('student_first_name', 'student_first_name'),
+    ('student_patronymic', 'student_patronymic'),
+    ('question1', 'question1'),
+    ('question2', 'question2'),
+    ('question3', 'question3'),
+    ('question4', 'question4'),
+    ('question5', 'question5'),
+    ('comment1', 'comment1'),
+    ('comment2', 'comment2'),
+]
+
+RAW_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# query parameter and the meeting lookup it filters by
+RAW_FILTERS = {
+    'university': 'poll__meeting__subject__university',
+    'subject': 'poll__meeting__subject',
+    'teacher': 'poll__meeting__teacher',
+}
+
+
+def raw_poll_results(start=None, end=None, **filters):
+    """Flat value tuples of poll results in RAW_COLUMNS order.
+
+    `start` and `end` are inclusive meeting dates, `filters` are ids keyed by RAW_FILTERS names.
+    """
+    filters = {RAW_FILTERS[name]: value for name, value in filters.items()}
+    filters.update(date_filters('poll__meeting__date', start, end))
+    return (PollResult.objects.filter(**filters)
+            .order_by('pk')
+            .values_list(*(lookup for name, lookup in RAW_COLUMNS))
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, lookup in RAW_COLUMNS])
+    for row in rows:
+        writer.writerow([value.isoformat() if isinstance(value, datetime.datetime) else value for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows):
+    names = [name for name, lookup in RAW_COLUMNS]
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(names, row)), ensure_ascii=False, default=datetime.datetime.isoformat) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+            size = 0
+    yield ''.join(lines)
+
+
+def raw_chunks(rows, output_format):
+    """UTF-8 encoded chunks of the rows written as CSV with a header line or as one JSON object per line."""
+    lines = _csv_lines(rows) if output_format == 'csv' else _ndjson_lines(rows)
+    for chunk in lines:
+        if chunk:
+            yield chunk.encode()
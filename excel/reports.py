@@ -0,0 +1,281 @@
+import datetime
+import functools
+import operator
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from admin_api.models import University, Subject, Meeting, Teacher
+from admin_api.rollups import AVG_FIELDS, day_start
+from admin_api.statistics import rollup_totals
+from .engine import Column, Table, Report
+
+
+# poll questions in the order of their marks
+CRITERIA = ['Взаимодействие с аудиторией', 'Информативность', 'Доступность', 'Интерес', 'Подача материала']
+
+# mean of the poll question averages of a meeting, 0 until every question has been rated
+MEETING_RATING = Coalesce(functools.reduce(operator.add, [F('poll__' + field) for field in AVG_FIELDS]) / 5,
+                          Value(0.0))
+
+
+def date_filters(lookup, start=None, end=None):
+    """Filters keeping the datetimes `lookup` leads to within the `start` to `end` local dates inclusive."""
+    filters = {}
+    if start is not None:
+        filters[lookup + '__gte'] = day_start(start)
+    if end is not None:
+        filters[lookup + '__lt'] = day_start(end + datetime.timedelta(days=1))
+    return filters
+
+
+def _period(start, end):
+    bounds = [prefix + date.strftime("%d.%m.%Y") for prefix, date in (('с ', start), ('по ', end)) if date is not None]
+    return ['Период: ' + ' '.join(bounds)] if bounds else []
+
+
+def _meeting_type(meeting_type):
+    return 'Лекции' if meeting_type == 'lecture' else 'Практики'
+
+
+def _full_name(second_name, first_name, patronymic):
+    return '{} {} {}'.format(second_name, first_name, patronymic)
+
+
+def _rating(totals):
+    polls_count, rating_sum = totals[:2] if totals else (0, 0)
+    return rating_sum / polls_count if polls_count else None
+
+
+def _meeting_name(subject_name, date):
+    return '{} ({})'.format(subject_name, timezone.localtime(date).strftime("%d.%m.%y"))
+
+
+def institute_subjects(institute_id, start=None, end=None):
+    institute = University.objects.get(pk=institute_id)
+
+    subjects = list(Subject.objects.filter(university=institute_id).order_by('pk').values_list('pk', 'name'))
+    if len(subjects) == 0:
+        return None
+    totals = rollup_totals('subject', start, end, university=institute_id)
+
+    return Report('Отчет по ' + institute.name, [
+        Table([Column('Дисциплина', width=43), Column('Балл', 'number')],
+              ((name, _rating(totals.get(pk))) for pk, name in subjects)),
+    ], meta=_period(start, end))
+
+
+def institute_teachers(institute_id, start=None, end=None):
+    institute = University.objects.get(pk=institute_id)
+
+    teachers = list(Teacher.objects.filter(university=institute_id).order_by('pk')
+                    .values_list('pk', 'second_name', 'first_name', 'patronymic'))
+    if len(teachers) == 0:
+        return None
+    totals = rollup_totals('teacher', start, end, teacher__university=institute_id)
+
+    return Report('Отчет по ' + institute.name, [
+        Table([Column('Преподаватель', width=43), Column('Балл', 'number')],
+              ((_full_name(*name), _rating(totals.get(pk))) for pk, *name in teachers)),
+    ], meta=_period(start, end))
+
+
+def subject_teachers(subject_id, start=None, end=None):
+    subject = Subject.objects.get(pk=subject_id)
+
+    fields = ['pk', 'second_name', 'first_name', 'patronymic']
+    teachers = [(meeting_type, row)
+                for meeting_type, related in (('Лекции', subject.lecture_teachers),
+                                              ('Практики', subject.practice_teachers))
+                for row in related.order_by('pk').values_list(*fields)]
+    if len(teachers) == 0:
+        return None
+    totals = rollup_totals('teacher', start, end, teacher__in={row[0] for meeting_type, row in teachers})
+
+    return Report('Отчет по ' + subject.name, [
+        Table([Column('Преподаватель', width=43), Column('Формат', width=11), Column('Балл', 'number')],
+              ((_full_name(*name), meeting_type, _rating(totals.get(pk))) for meeting_type, (pk, *name) in teachers)),
+    ], meta=_period(start, end))
+
+
+def subject_meetings(subject_id, start=None, end=None):
+    subject = Subject.objects.get(pk=subject_id)
+
+    meetings = list(Meeting.objects.filter(subject=subject_id, **date_filters('date', start, end)).order_by('pk')
+                    .values_list('date', 'type', MEETING_RATING))
+    if len(meetings) == 0:
+        return None
+
+    return Report('Отчет по ' + subject.name, [
+        Table([Column('Пара', width=43), Column('Формат', width=11), Column('Балл', 'number')],
+              ((_meeting_name(subject.name, date), _meeting_type(meeting_type), rating)
+               for date, meeting_type, rating in meetings)),
+    ], meta=_period(start, end))
+
+
+def teacher_subjects(teacher_id, start=None, end=None):
+    teacher = Teacher.objects.get(pk=teacher_id)
+
+    subjects = [(meeting_type, row)
+                for meeting_type, related in (('Лекции', teacher.lecture_teachers),
+                                              ('Практики', teacher.practice_teachers))
+                for row in related.order_by('pk').values_list('pk', 'name')]
+    if len(subjects) == 0:
+        return None
+    totals = rollup_totals('subject', start, end, subject__in={pk for meeting_type, (pk, name) in subjects})
+
+    return Report('Отчет по ' + _full_name(teacher.second_name, teacher.first_name, teacher.patronymic), [
+        Table([Column('Дисциплина', width=43), Column('Формат', width=11), Column('Балл', 'number')],
+              ((name, meeting_type, _rating(totals.get(pk))) for meeting_type, (pk, name) in subjects)),
+    ], meta=_period(start, end))
+
+
+def teacher_meetings(teacher_id, start=None, end=None):
+    teacher = Teacher.objects.get(pk=teacher_id)
+
+    meetings = list(Meeting.objects.filter(teacher=teacher_id, **date_filters('date', start, end)).order_by('pk')
+                    .values_list('subject__name', 'date', 'type', MEETING_RATING))
+    if len(meetings) == 0:
+        return None
+
+    return Report('Отчет по ' + _full_name(teacher.second_name, teacher.first_name, teacher.patronymic), [
+        Table([Column('Пара', width=43), Column('Формат', width=11), Column('Балл', 'number')],
+              ((_meeting_name(subject_name, date), _meeting_type(meeting_type), rating)
+               for subject_name, date, meeting_type, rating in meetings)),
+    ], meta=_period(start, end))
+
+
+def meeting_report(meeting_id, start=None, end=None):
+    """Marks and comments of one meeting, the date range does not apply to it."""
+    meeting = Meeting.objects.select_related('teacher', 'subject', 'poll').get(pk=meeting_id)
+    comments = meeting.poll.pollresult_set.order_by('pk').values_list('comment1', 'comment2')
+
+    return Report('Отчет по паре', meta=[
+        'Преподаватель: ' + _full_name(meeting.teacher.second_name, meeting.teacher.first_name,
+                                       meeting.teacher.patronymic),
+        'Дисциплина: ' + meeting.subject.name,
+        'Формат: ' + _meeting_type(meeting.type),
+        'Дата и время пары: ' + meeting.date.strftime("%d.%m.%Y %H:%M"),
+    ], meta_style='tableheader', tables=[
+        Table([Column('Параметр', width=43), Column('Балл', 'number', width=43)],
+              zip(CRITERIA, [getattr(meeting.poll, field) for field in AVG_FIELDS]), auto_filter=False),
+        Table([Column('Позитивные впечатления', 'comment'), Column('Негативные впечатления', 'comment')],
+              comments, auto_filter=False, row_height=100),
+    ])
+
+
+def _rollup_row(name, totals):
+    polls_count = totals[0] if totals else 0
+    if not polls_count:
+        return (name, 0, None) + (None,) * len(CRITERIA)
+    return (name, polls_count) + tuple(total / polls_count for total in totals[1:])
+
+
+def _meeting_row(subject_name, date, meeting_type, second_name, first_name, patronymic, responses, rating, *marks):
+    teacher = _full_name(second_name, first_name, patronymic) if second_name is not None else None
+    return ((_meeting_name(subject_name, date), _meeting_type(meeting_type), teacher, responses or 0, rating)
+            + tuple(marks))
+
+
+def university_workbook(university_id, start=None, end=None):
+    """Subjects, teachers, meetings and per question marks of the whole university in one workbook.
+
+    Ratings are summed from the daily rollups of the date range, the university is read with six queries.
+    """
+    university = University.objects.get(pk=university_id)
+
+    subjects = list(Subject.objects.filter(university=university_id).order_by('name', 'pk').values_list('pk', 'name'))
+    teachers = list(Teacher.objects.filter(university=university_id).order_by('second_name', 'first_name', 'pk')
+                    .values_list('pk', 'second_name', 'first_name', 'patronymic'))
+    if len(subjects) == 0 and len(teachers) == 0:
+        return None
+    subject_totals = rollup_totals('subject', start, end, university=university_id)
+    teacher_totals = rollup_totals('teacher', start, end, teacher__university=university_id)
+    subject_rows = [_rollup_row(name, subject_totals.get(pk)) for pk, name in subjects]
+    teacher_rows = [_rollup_row(_full_name(*name), teacher_totals.get(pk)) for pk, *name in teachers]
+
+    meetings = (Meeting.objects.filter(subject__university=university_id, **date_filters('date', start, end))
+                .order_by('date', 'pk')
+                .values_list('subject__name', 'date', 'type', 'teacher__second_name', 'teacher__first_name',
+                             'teacher__patronymic', 'poll__response_count', MEETING_RATING,
+                             *['poll__' + field for field in AVG_FIELDS])
+                .iterator(chunk_size=2000))
+    meeting_rows = (_meeting_row(*row) for row in meetings)
+
+    title = 'Отчет по ' + university.name
+    meta = _period(start, end)
+    criteria = [Column(name, 'number') for name in CRITERIA]
+    return [
+        Report(title, [
+            Table([Column('Дисциплина', width=43), Column('Оценено пар'), Column('Балл', 'number')],
+                  (row[:3] for row in subject_rows)),
+        ], meta=meta, sheet_title='Дисциплины'),
+        Report(title, [
+            Table([Column('Преподаватель', width=43), Column('Оценено пар'), Column('Балл', 'number')],
+                  (row[:3] for row in teacher_rows)),
+        ], meta=meta, sheet_title='Преподаватели'),
+        Report(title, [
+            Table([Column('Пара', width=43), Column('Формат', width=11), Column('Преподаватель', width=43),
+                   Column('Ответов'), Column('Балл', 'number')] + criteria, meeting_rows),
+        ], meta=meta, sheet_title='Пары'),
+        Report(title, [
+            Table([Column('Дисциплина', width=43)] + criteria, (row[:1] + row[3:] for row in subject_rows),
+                  auto_filter=False),
+            Table([Column('Преподаватель', width=43)] + criteria, (row[:1] + row[3:] for row in teacher_rows),
+                  auto_filter=False),
+        ], meta=meta, sheet_title='Критерии'),
+    ]
+
+
+# report definitions by name, each takes the id of its object and an optional inclusive start and end date, and
+# returns the Report (or a list of them, one per sheet) or None when there are no rows, a missing object raises its
+# DoesNotExist
+REPORTS = {
+    'institute_subjects': institute_subjects,
+    'institute_teachers': institute_teachers,
+    'subject_teachers': subject_teachers,
+    'subject_meetings': subject_meetings,
+    'teacher_subjects': teacher_subjects,
+    'teacher_meetings': teacher_meetings,
+    'meeting': meeting_report,
+    'university': university_workbook,
+}
+
+
+def _university(university_id):
+    return [University.objects.values_list('pk', flat=True).get(pk=university_id)]
+
+
+def _subject_universities(subject_id, with_teachers=False):
+    universities = [Subject.objects.values_list('university', flat=True).get(pk=subject_id)]
+    if with_teachers:
+        universities += list(Teacher.objects.filter(Q(lecture_teachers=subject_id) | Q(practice_teachers=subject_id))
+                             .values_list('university', flat=True))
+    return universities
+
+
+def _teacher_subject_universities(teacher_id):
+    return [Teacher.objects.values_list('university', flat=True).get(pk=teacher_id)] + list(
+        Subject.objects.filter(Q(lecture_teachers=teacher_id) | Q(practice_teachers=teacher_id))
+        .values_list('university', flat=True))
+
+
+def _teacher_meeting_universities(teacher_id):
+    return [Teacher.objects.values_list('university', flat=True).get(pk=teacher_id)] + list(
+        Meeting.objects.filter(teacher=teacher_id).values_list('subject__university', flat=True).distinct())
+
+
+def _meeting_universities(meeting_id):
+    return list(Meeting.objects.values_list('subject__university', 'teacher__university').get(pk=meeting_id))
+
+
+# universities whose data version covers everything a report shows, by report name
+REPORT_UNIVERSITIES = {
+    'institute_subjects': _university,
+    'institute_teachers': _university,
+    'subject_teachers': lambda subject_id: _subject_universities(subject_id, with_teachers=True),
+    'subject_meetings': _subject_universities,
+    'teacher_subjects': _teacher_subject_universities,
+    'teacher_meetings': _teacher_meeting_universities,
+    'meeting': _meeting_universities,
+    'university': _university,
+}
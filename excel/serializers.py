@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'report', 'object_id', 'start', 'end', 'status', 'error', 'created_at', 'finished_at', 'expires_at']
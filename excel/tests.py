@@ -1,3 +1,329 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import tempfile
+import time
+from unittest import mock
+from django.core.cache import caches
+from django.utils import timezone
+from openpyxl import load_workbook
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from admin_api.models import CustomUser, University, Subject, Teacher, Meeting
+from admin_api.versions import bump_versions
+from polls.models import Poll, PollResult
+from .cache import REPORT_CACHE, report_file
+from .engine import TITLE_HEIGHT, Column, Table, Report, render
+from .export import save_workbook
+from .models import ExportJob
+from .reports import CRITERIA, institute_subjects
 
-# Create your tests here.
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'ratings': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratings'},
+    'reports': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reports'},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ExportJobTest(TransactionTestCase):
+    # jobs run in the export threads, which only see committed rows
+
+    def setUp(self):
+        export_root = tempfile.TemporaryDirectory()
+        self.addCleanup(export_root.cleanup)
+        storage = ExportJob._meta.get_field('file').storage
+        patcher = mock.patch.object(storage, 'location', export_root.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = CustomUser.objects.create(username='admin', user_type='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.university = University.objects.create(name='Университет', short_name='У')
+
+    def export(self, university_id):
+        response = self.client.post('/excel/institute/{}/subjects'.format(university_id))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        return response.data['id']
+
+    def wait(self, job_id):
+        for _ in range(200):
+            response = self.client.get('/excel/jobs/{}/'.format(job_id))
+            self.assertEqual(response.status_code, 200)
+            if response.data['status'] not in ('pending', 'running'):
+                return response.data
+            time.sleep(0.05)
+        self.fail('export job {} did not finish'.format(job_id))
+
+    def test_report_is_built_in_the_background(self):
+        Subject.objects.create(university=self.university, name='Дисциплина')
+        job_id = self.export(self.university.pk)
+
+        self.assertEqual(self.wait(job_id)['status'], 'done')
+        response = self.client.get('/excel/jobs/{}/download'.format(job_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_reports_without_rows_and_missing_objects(self):
+        job = self.wait(self.export(self.university.pk))
+        self.assertEqual(job['status'], 'empty')
+        self.assertEqual(self.client.get('/excel/jobs/{}/download'.format(job['id'])).status_code, 204)
+
+        job = self.wait(self.export(self.university.pk + 1000))
+        self.assertEqual((job['status'], job['error']), ('failed', 'not found'))
+        self.assertEqual(self.client.get('/excel/jobs/{}/download'.format(job['id'])).status_code, 409)
+
+    def test_jobs_are_visible_to_their_user_only(self):
+        job_id = self.export(self.university.pk)
+        self.wait(job_id)
+
+        other = APIClient()
+        other.force_authenticate(CustomUser.objects.create(username='other', user_type='admin'))
+        self.assertEqual(other.get('/excel/jobs/{}/'.format(job_id)).status_code, 404)
+        self.assertEqual(other.get('/excel/jobs/{}/download'.format(job_id)).status_code, 404)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ReportCacheTest(TestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.university = University.objects.create(name='Университет', short_name='У')
+        Subject.objects.create(university=self.university, name='Дисциплина')
+        builder = mock.Mock(wraps=institute_subjects)
+        patcher = mock.patch.dict('excel.cache.REPORTS', institute_subjects=builder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.builder = builder
+
+    def report(self):
+        file = report_file('institute_subjects', self.university.pk)
+        with file:
+            return file.read()
+
+    def test_reports_are_rebuilt_when_the_data_version_changes(self):
+        content = self.report()
+        self.assertEqual(self.report(), content)
+        self.assertEqual(self.builder.call_count, 1)
+
+        bump_versions([self.university.pk])
+        self.report()
+        self.assertEqual(self.builder.call_count, 2)
+
+    def test_dates_are_part_of_the_key(self):
+        self.report()
+        report_file('institute_subjects', self.university.pk, end=datetime.date(2024, 1, 1)).close()
+        self.assertEqual(self.builder.call_count, 2)
+
+    def test_reports_without_rows_are_cached(self):
+        other = University.objects.create(name='Другой университет', short_name='Д')
+        self.assertIsNone(report_file('institute_subjects', other.pk))
+        self.assertIsNone(report_file('institute_subjects', other.pk))
+        self.assertEqual(self.builder.call_count, 1)
+
+    @override_settings(REPORT_CACHE_MAX_SIZE=0)
+    def test_large_reports_are_not_cached(self):
+        self.report()
+        self.report()
+        self.assertEqual(self.builder.call_count, 2)
+
+
+def rated_meeting(subject, date=None, mark=3, teacher=None):
+    poll = Poll.objects.create(**{'question{}_avg_mark'.format(number): mark for number in range(1, 6)})
+    return Meeting.objects.create(subject=subject, teacher=teacher, date=date or timezone.now(), poll=poll)
+
+
+def sheet_rows(sheet):
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ReportResponseTest(TestCase):
+    def setUp(self):
+        caches[REPORT_CACHE].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(username='admin', user_type='admin'))
+        self.university = University.objects.create(name='Университет', short_name='У')
+        self.subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        self.teacher = Teacher.objects.create(username='teacher', university=self.university,
+                                              second_name='Иванов', first_name='Иван', patronymic='Иванович')
+
+    def workbook(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        return load_workbook(io.BytesIO(content))
+
+    def test_meeting_report_is_streamed_as_a_workbook(self):
+        meeting = rated_meeting(self.subject, mark=4, teacher=self.teacher)
+        PollResult.objects.create(poll=meeting.poll, student_first_name='Петр', student_second_name='Петров',
+                                  student_patronymic='Петрович', comment1='Понятно', comment2='Быстро')
+
+        workbook = self.workbook('/excel/meeting/{}'.format(meeting.pk))
+        rows = sheet_rows(workbook.active)
+        self.assertEqual(rows[0][0], 'Отчет по паре')
+        self.assertEqual(rows[1][0], 'Преподаватель: Иванов Иван Иванович')
+        self.assertEqual(rows[2][0], 'Дисциплина: Дисциплина')
+        self.assertEqual(rows[3][0], 'Формат: Лекции')
+        self.assertEqual(rows[7][:2], ['Параметр', 'Балл'])
+        self.assertEqual([row[:2] for row in rows[8:13]], [[name, 4] for name in CRITERIA])
+        self.assertEqual(rows[14][:2], ['Позитивные впечатления', 'Негативные впечатления'])
+        self.assertEqual(rows[15][:2], ['Понятно', 'Быстро'])
+        self.assertEqual(len(rows), 16)
+
+    def test_subject_report_lists_the_meetings(self):
+        dates = [timezone.make_aware(datetime.datetime(2024, 3, day, 12)) for day in (1, 2)]
+        for date, mark in zip(dates, (2, 5)):
+            rated_meeting(self.subject, date=date, mark=mark, teacher=self.teacher)
+
+        rows = sheet_rows(self.workbook('/excel/subject/{}/meetings'.format(self.subject.pk)).active)
+        self.assertEqual(rows[0][0], 'Отчет по Дисциплина')
+        self.assertEqual(rows[3], ['Пара', 'Формат', 'Балл'])
+        self.assertEqual(rows[4:], [['Дисциплина (01.03.24)', 'Лекции', 2], ['Дисциплина (02.03.24)', 'Лекции', 5]])
+
+    def test_institute_workbook_has_a_sheet_per_part(self):
+        idle = Subject.objects.create(university=self.university, name='Архитектура')
+        date = timezone.make_aware(datetime.datetime(2024, 3, 1, 12))
+        with self.captureOnCommitCallbacks(execute=True):
+            for mark in (2, 4):
+                rated_meeting(self.subject, date=date, mark=mark, teacher=self.teacher)
+
+        workbook = self.workbook('/excel/institute/{}/workbook'.format(self.university.pk))
+        self.assertEqual(workbook.sheetnames, ['Дисциплины', 'Преподаватели', 'Пары', 'Критерии'])
+
+        subjects = sheet_rows(workbook['Дисциплины'])
+        self.assertEqual(subjects[0][0], 'Отчет по Университет')
+        self.assertEqual(subjects[3:], [['Дисциплина', 'Оценено пар', 'Балл'], [idle.name, 0, None],
+                                        ['Дисциплина', 2, 3]])
+        self.assertEqual(sheet_rows(workbook['Преподаватели'])[4:], [['Иванов Иван Иванович', 2, 3]])
+
+        meetings = sheet_rows(workbook['Пары'])
+        self.assertEqual(meetings[3], ['Пара', 'Формат', 'Преподаватель', 'Ответов', 'Балл'] + CRITERIA)
+        self.assertEqual([row[4] for row in meetings[4:]], [2, 4])
+        self.assertEqual(meetings[4][:4], ['Дисциплина (01.03.24)', 'Лекции', 'Иванов Иван Иванович', 0])
+
+        criteria = sheet_rows(workbook['Критерии'])
+        self.assertEqual(criteria[3], ['Дисциплина'] + CRITERIA)
+        self.assertEqual(criteria[4:6], [[idle.name] + [None] * 5, ['Дисциплина'] + [3] * 5])
+        self.assertEqual(criteria[7], ['Преподаватель'] + CRITERIA)
+        self.assertEqual(criteria[8], ['Иванов Иван Иванович'] + [3] * 5)
+
+    def test_institute_workbook_without_subjects_and_teachers(self):
+        empty = University.objects.create(name='Пустой', short_name='П')
+        self.assertEqual(self.client.get('/excel/institute/{}/workbook'.format(empty.pk)).status_code, 204)
+        self.assertEqual(self.client.get('/excel/institute/{}/workbook'.format(empty.pk + 1000)).status_code, 404)
+
+    def test_reports_cover_the_date_range(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for day, mark in ((1, 2), (15, 4), (30, 5)):
+                date = timezone.make_aware(datetime.datetime(2024, 3, day, 12))
+                rated_meeting(self.subject, date=date, mark=mark, teacher=self.teacher)
+
+        url = '/excel/subject/{}/meetings?from=2024-03-02&to=2024-03-30'.format(self.subject.pk)
+        rows = sheet_rows(self.workbook(url).active)
+        self.assertEqual(rows[1][0], 'Период: с 02.03.2024 по 30.03.2024')
+        self.assertEqual(rows[5:], [['Дисциплина (15.03.24)', 'Лекции', 4], ['Дисциплина (30.03.24)', 'Лекции', 5]])
+
+        url = '/excel/institute/{}/subjects?to=2024-03-15'.format(self.university.pk)
+        rows = sheet_rows(self.workbook(url).active)
+        self.assertEqual(rows[1][0], 'Период: по 15.03.2024')
+        self.assertEqual(rows[5:], [['Дисциплина', 3]])
+
+        url = '/excel/teacher/{}/meetings'.format(self.teacher.pk)
+        self.assertEqual(self.client.get(url + '?from=2024-04-01').status_code, 204)
+        self.assertEqual(self.client.get(url + '?from=2024-03-02&to=2024-03-01').status_code, 400)
+        self.assertEqual(self.client.get(url + '?to=01.03.2024').status_code, 400)
+
+
+class EngineTest(TestCase):
+    def load(self, report):
+        with save_workbook(render(report)) as file:
+            return load_workbook(io.BytesIO(file.read()))
+
+    def test_report_layout(self):
+        report = Report('Отчет', [
+            Table([Column('Название', width=43), Column('Балл', 'number')], iter([('Первый', 4.5), ('Второй', None)])),
+            Table([Column('Комментарий', 'comment')], [('Текст',)], auto_filter=False, row_height=100),
+        ], meta=['Период: с 01.09.2024'])
+
+        sheet = self.load(report).active
+        rows = sheet_rows(sheet)
+        self.assertEqual(rows[0][0], 'Отчет')
+        self.assertEqual(rows[1][0], 'Период: с 01.09.2024')
+        self.assertTrue(rows[2][0].startswith('Дата и время обращения: '))
+        self.assertEqual(rows[4:7], [['Название', 'Балл'], ['Первый', 4.5], ['Второй', None]])
+        self.assertEqual(rows[8][0], 'Комментарий')
+        self.assertEqual(rows[9][0], 'Текст')
+
+        self.assertEqual(sheet.row_dimensions[1].height, TITLE_HEIGHT)
+        self.assertEqual(sheet.row_dimensions[10].height, 100)
+        self.assertEqual(sheet.column_dimensions['A'].width, 43)
+        self.assertEqual(sheet.auto_filter.ref, 'A5:B7')
+        self.assertEqual(sheet['A1'].style, 'Заголовок документа')
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual(sheet['A5'].style, 'Заголовок таблицы')
+        self.assertEqual((sheet['B6'].style, sheet['B6'].number_format), ('Числа', '0.0'))
+        self.assertTrue(sheet['A10'].alignment.wrap_text)
+
+    def test_one_sheet_per_report(self):
+        workbook = self.load([Report('Первый', [], sheet_title='Один'), Report('Второй', [], sheet_title='Два')])
+        self.assertEqual(workbook.sheetnames, ['Один', 'Два'])
+        self.assertEqual(workbook['Два']['A1'].value, 'Второй')
+
+
+class PollResultExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(username='admin', user_type='admin'))
+        self.university = University.objects.create(name='Университет', short_name='У')
+        self.subject = Subject.objects.create(university=self.university, name='Дисциплина')
+        self.teacher = Teacher.objects.create(username='teacher', university=self.university)
+        meeting = rated_meeting(self.subject, teacher=self.teacher)
+        self.result = PollResult.objects.create(poll=meeting.poll, student_first_name='Петр',
+                                                student_second_name='Петров', student_patronymic='Петрович',
+                                                question1=4, comment1='Понятно')
+        other_subject = Subject.objects.create(university=self.university, name='Другая дисциплина')
+        PollResult.objects.create(poll=rated_meeting(other_subject).poll, student_first_name='Анна',
+                                  student_second_name='Смирнова', student_patronymic='Ивановна')
+
+    def export(self, query=''):
+        response = self.client.get('/excel/poll-results' + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_rows(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('?subject={}'.format(self.subject.pk)))))
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['poll_result_id'], str(self.result.pk))
+        self.assertEqual((row['subject_name'], row['teacher_id'], row['university_name']),
+                         ('Дисциплина', str(self.teacher.pk), 'Университет'))
+        self.assertEqual((row['student_second_name'], row['question1'], row['comment1'], row['comment2']),
+                         ('Петров', '4', 'Понятно', ''))
+
+    def test_ndjson_lines(self):
+        lines = self.export('?output=ndjson&university={}'.format(self.university.pk)).splitlines()
+        results = [json.loads(line) for line in lines]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['poll_result_id'], self.result.pk)
+        self.assertEqual((results[0]['teacher_id'], results[1]['teacher_id']), (self.teacher.pk, None))
+        self.assertIsNone(results[0]['comment2'])
+
+    def test_filters(self):
+        self.assertEqual(len(self.export('?teacher={}'.format(self.teacher.pk)).splitlines()), 2)
+        self.assertEqual(self.export('?university={}'.format(self.university.pk + 1000)).splitlines(),
+                         [self.export().splitlines()[0]])
+        self.assertEqual(len(self.export('?to=2000-01-01&output=ndjson').splitlines()), 0)
+
+    def test_bad_requests(self):
+        for query in ('?output=xlsx', '?subject=abc', '?teacher=-1', '?from=2024-13-01',
+                      '?from=2024-02-01&to=2024-01-01'):
+            self.assertEqual(self.client.get('/excel/poll-results' + query).status_code, 400, query)
+
+        other = APIClient()
+        other.force_authenticate(Teacher.objects.create(username='other', user_type='teacher',
+                                                        university=self.university))
+        self.assertEqual(other.get('/excel/poll-results').status_code, 403)
@@ -4,9 +4,13 @@ from . import views
 urlpatterns = [
     path('institute/<int:insitute_id>/subjects', views.institute_to_subject),
     path('institute/<int:insitute_id>/teachers', views.institute_to_teacher),
+    path('institute/<int:insitute_id>/workbook', views.institute_workbook),
     path('subject/<int:subject_id>/teachers', views.subject_to_teacher),
     path('subject/<int:subject_id>/meetings', views.subject_to_meeting),
     path('teacher/<int:teacher_id>/subjects', views.teacher_to_subject),
     path('teacher/<int:teacher_id>/meetings', views.teacher_to_meeting),
-    path('meeting/<int:meeting_id>', views.get_meeting)
-]
\ No newline at end of file
+    path('meeting/<int:meeting_id>', views.get_meeting),
+    path('jobs/<uuid:job_id>/', views.export_job_status),
+    path('jobs/<uuid:job_id>/download', views.export_job_download),
+    path('poll-results', views.poll_results_export)
+]
@@ -0,0 +1,77 @@
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+from .models import Poll
+
+OPEN = 'open'
+CLOSED = 'closed'
+UNKNOWN = 'unknown'
+
+# submission windows (opens, closes) of the polls that are open or upcoming, either bound may be None
+_windows = {}
+_loaded_at = None
+_invalidations = 0
+_lock = threading.Lock()
+
+
+def load_poll_windows():
+    """Submission windows of every poll whose window has not ended yet, keyed by poll id.
+
+    Explicit opens_at and closes_at win, otherwise the window starts at the meeting date and lasts
+    POLL_OPEN_HOURS. Polls with neither a meeting nor an explicit end are closed.
+    """
+    now = timezone.now()
+    duration = timedelta(hours=settings.POLL_OPEN_HOURS)
+    polls = (Poll.objects.annotate(meeting_date=Min('meeting__date'))
+             .filter(Q(closes_at__gte=now) | Q(closes_at__isnull=True, meeting_date__gte=now - duration))
+             .values_list('pk', 'opens_at', 'closes_at', 'meeting_date'))
+    windows = {}
+    for pk, opens_at, closes_at, meeting_date in polls:
+        if closes_at is None:
+            closes_at = meeting_date + duration
+        windows[pk] = (opens_at or meeting_date, closes_at)
+    return windows
+
+
+def poll_windows_stale(polls=()):
+    """Whether the windows should be reloaded before checking the given polls.
+
+    Polls missing from the windows cause a reload at most every POLL_WINDOWS_MISS_SECONDS, so that floods of
+    unknown or closed poll ids stay off the database.
+    """
+    if _loaded_at is None:
+        return True
+    age = time.monotonic() - _loaded_at
+    return age > settings.POLL_WINDOWS_TTL or (age > settings.POLL_WINDOWS_MISS_SECONDS
+                                               and any(poll not in _windows for poll in polls))
+
+
+def refresh_poll_windows(polls=()):
+    global _windows, _loaded_at
+    with _lock:
+        if poll_windows_stale(polls):
+            invalidations = _invalidations
+            _windows = load_poll_windows()
+            # a poll or meeting saved while loading leaves the windows stale
+            _loaded_at = time.monotonic() if invalidations == _invalidations else None
+
+
+def invalidate_poll_windows():
+    global _loaded_at, _invalidations
+    _invalidations += 1
+    _loaded_at = None
+
+
+def poll_state(poll_id):
+    """OPEN, CLOSED or UNKNOWN from the windows in memory, callers refresh them first when they are stale."""
+    window = _windows.get(poll_id)
+    if window is None:
+        return UNKNOWN
+    opens_at, closes_at = window
+    now = timezone.now()
+    if (opens_at is not None and now < opens_at) or (closes_at is not None and now > closes_at):
+        return CLOSED
+    return OPEN
@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Sum
+from admin_api.rollups import QUESTIONS, AVG_FIELDS, apply_poll_change, poll_marks
+from admin_api.signals import bump_poll_versions
+from .models import Poll, PollResult, PollCounterShard
+
+SUM_FIELDS = [question + '_sum' for question in QUESTIONS]
+COUNTER_FIELDS = ['response_count'] + SUM_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# polls this process has added to the counter shards of since its folder thread last ran
+_dirty = set()
+_dirty_lock = threading.Lock()
+_folder = None
+
+
+def _update_averages(poll, old_marks):
+    for avg_field, sum_field in zip(AVG_FIELDS, SUM_FIELDS):
+        setattr(poll, avg_field, getattr(poll, sum_field) / poll.response_count)
+    poll.save(update_fields=AVG_FIELDS)
+    apply_poll_change(poll.pk, old_marks, poll_marks(poll))
+
+
+@transaction.atomic
+def add_poll_results(poll_id, count, sums):
+    """Adds `count` responses with the per-question mark `sums` to the running totals of a poll.
+
+    The increment is a single UPDATE, so the poll row stays locked until commit and the averages
+    recalculated below always match the totals, whatever the number of concurrent submissions.
+    With POLL_COUNTER_SHARDS set the totals go to a random counter shard of the poll instead and reach
+    the poll, its averages and the rating rollups when the folder thread of the process next runs.
+    """
+    if settings.POLL_COUNTER_SHARDS:
+        _add_to_shard(poll_id, count, sums)
+        transaction.on_commit(lambda: _mark_dirty(poll_id), robust=True)
+        return
+
+    updates = {field: F(field) + value for field, value in zip(SUM_FIELDS, sums)}
+    Poll.objects.filter(pk=poll_id).update(response_count=F('response_count') + count, **updates)
+    poll = Poll.objects.get(pk=poll_id)
+    _update_averages(poll, poll_marks(poll))
+
+
+def _add_to_shard(poll_id, count, sums):
+    shard = random.randrange(settings.POLL_COUNTER_SHARDS)
+    updates = {field: F(field) + value for field, value in zip(SUM_FIELDS, sums)}
+    shards = PollCounterShard.objects.filter(poll=poll_id, shard=shard)
+    if shards.update(response_count=F('response_count') + count, **updates):
+        return
+    try:
+        with transaction.atomic():
+            PollCounterShard.objects.create(poll_id=poll_id, shard=shard, response_count=count,
+                                            **dict(zip(SUM_FIELDS, sums)))
+    except IntegrityError:
+        shards.update(response_count=F('response_count') + count, **updates)
+
+
+@transaction.atomic
+def fold_poll_counters(polls=None):
+    """Moves the counter shards of the given polls (all polls by default) into their totals and averages.
+
+    Polls another transaction is folding right now are skipped. The poll rows are locked FOR NO KEY UPDATE, so
+    submissions inserting results for them are not blocked. Versions are bumped after commit, once the rating
+    rollups have moved. Returns the ids of the folded polls.
+    """
+    shards = PollCounterShard.objects.filter(response_count__gt=0)
+    if polls is not None:
+        shards = shards.filter(poll__in=polls)
+    folded = []
+    for poll in (Poll.objects.select_for_update(skip_locked=True, no_key=True).filter(pk__in=shards.values('poll'))
+                 .order_by('pk')):
+        poll_shards = list(PollCounterShard.objects.select_for_update().filter(poll=poll.pk, response_count__gt=0))
+        if not poll_shards:
+            continue
+        PollCounterShard.objects.filter(pk__in=[shard.pk for shard in poll_shards]).update(
+            **dict.fromkeys(COUNTER_FIELDS, 0))
+        old_marks = poll_marks(poll)
+        for field in COUNTER_FIELDS:
+            setattr(poll, field, getattr(poll, field) + sum(getattr(shard, field) for shard in poll_shards))
+        poll.save(update_fields=COUNTER_FIELDS)
+        _update_averages(poll, old_marks)
+        folded.append(poll.pk)
+    if folded:
+        transaction.on_commit(lambda: bump_poll_versions(folded), robust=True)
+    return folded
+
+
+def _mark_dirty(poll_id):
+    global _folder
+    with _dirty_lock:
+        _dirty.add(poll_id)
+        if _folder is None or not _folder.is_alive():
+            _folder = threading.Thread(target=_fold_forever, name='poll-fold', daemon=True)
+            _folder.start()
+
+
+def fold_dirty_polls():
+    """Folds the counter shards of the polls this process has added to since the last call.
+
+    Polls skipped because another transaction was folding them are kept for the next call while they still have
+    shard totals.
+    """
+    with _dirty_lock:
+        polls = sorted(_dirty)
+        _dirty.clear()
+    if not polls:
+        return []
+    try:
+        folded = fold_poll_counters(polls)
+        skipped = set(polls) - set(folded)
+        if skipped:
+            skipped = set(PollCounterShard.objects.filter(poll__in=skipped, response_count__gt=0)
+                          .values_list('poll', flat=True))
+    except Exception:
+        with _dirty_lock:
+            _dirty.update(polls)
+        raise
+    with _dirty_lock:
+        _dirty.update(skipped)
+    return folded
+
+
+def _fold_forever():
+    while True:
+        time.sleep(settings.POLL_COUNTER_FOLD_SECONDS)
+        try:
+            fold_dirty_polls()
+        except Exception:
+            logger.exception('folding poll counter shards failed')
+        finally:
+            close_old_connections()
+
+
+def current_averages(poll, shard_totals):
+    """Averages of a poll values dict with its COUNTER_FIELDS, including the totals of its not yet folded shards."""
+    response_count = poll['response_count'] + (shard_totals['response_count'] or 0)
+    if not response_count:
+        return {field: poll[field] for field in AVG_FIELDS}
+    return {avg_field: (poll[sum_field] + (shard_totals[sum_field] or 0)) / response_count
+            for avg_field, sum_field in zip(AVG_FIELDS, SUM_FIELDS)}
+
+
+@transaction.atomic
+def create_poll_results(rows):
+    """Inserts validated poll results with one bulk INSERT and updates the totals of every affected poll once.
+
+    Returns the saved results in the order of `rows`. bulk_create skips the post_save signals, the data versions
+    of the polls are bumped here instead, after commit so that the version rows are not locked for the whole
+    transaction.
+    """
+    results = PollResult.objects.bulk_create([PollResult(**row) for row in rows], batch_size=500)
+    totals = {}
+    for result in results:
+        count, sums = totals.get(result.poll_id, (0, [0] * len(QUESTIONS)))
+        totals[result.poll_id] = count + 1, [total + getattr(result, question)
+                                             for total, question in zip(sums, QUESTIONS)]
+    for poll_id in sorted(totals):
+        add_poll_results(poll_id, *totals[poll_id])
+    transaction.on_commit(lambda: bump_poll_versions(list(totals)), robust=True)
+    return results
+
+
+@transaction.atomic
+def rebuild_poll_aggregates(polls=None):
+    """Recomputes running totals and averages of the given polls (all polls by default) from their results."""
+    queryset = Poll.objects.all() if polls is None else Poll.objects.filter(pk__in=polls)
+    PollCounterShard.objects.filter(poll__in=queryset).delete()
+    totals = (PollResult.objects.filter(poll__in=queryset)
+              .order_by()
+              .values('poll')
+              .annotate(response_count=Count('pk'), **{question + '_sum': Sum(question) for question in QUESTIONS}))
+    totals = {row.pop('poll'): row for row in totals}
+    changed = []
+    for poll in queryset:
+        row = totals.get(poll.pk, dict.fromkeys(['response_count'] + SUM_FIELDS, 0))
+        for field, value in row.items():
+            setattr(poll, field, value)
+        for avg_field, sum_field in zip(AVG_FIELDS, SUM_FIELDS):
+            setattr(poll, avg_field, getattr(poll, sum_field) / poll.response_count if poll.response_count else None)
+        changed.append(poll)
+    Poll.objects.bulk_update(changed, ['response_count'] + SUM_FIELDS + AVG_FIELDS, batch_size=500)
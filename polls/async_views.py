@@ -0,0 +1,198 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view
+from rest_framework.fields import DateTimeField
+from admin_api.models import Meeting
+from admin_api.rollups import AVG_FIELDS
+from .admission import CLOSED, UNKNOWN, poll_state, poll_windows_stale, refresh_poll_windows
+from .aggregates import create_poll_results, current_averages, COUNTER_FIELDS
+from .ingest import submit_poll_result
+from .models import Poll, PollCounterShard
+from .serializers import (PollGetSerializer, MeetingWithTeacherGetSerializer, PollResultSubmitSerializer,
+                          PollResultBulkSerializer)
+
+# Native async versions of the public noauth endpoints. Under an ASGI server a request keeps no worker thread of
+# its own, ORM calls share Django's database thread and batched submissions wait for their flush without any thread.
+# Responses match the DRF views they replace.
+
+# the fields PollGetSerializer renders
+POLL_FIELDS = list(PollGetSerializer().fields)
+MAX_BULK_POLL_RESULTS = 1000
+
+
+def documented(method, **schema):
+    """Lists the async view in the swagger schema like a DRF function view with the given swagger_auto_schema.
+
+    drf_yasg only documents views with an APIView class, the class of an equivalent DRF view is attached for it,
+    requests are still served by the async view.
+    """
+    def decorator(view):
+        drf_view = swagger_auto_schema(method=method, **schema)(api_view([method.upper()])(view))
+        view.cls = drf_view.cls
+        view.initkwargs = drf_view.initkwargs
+        view._swagger_auto_schema = drf_view._swagger_auto_schema
+        return view
+    return decorator
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False,
+                        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+@documented('get', responses={
+    200: PollGetSerializer,
+    404: 'not found'
+})
+@require_GET
+async def poll_get(request, pk):
+    if not settings.POLL_COUNTER_SHARDS:
+        try:
+            poll = await Poll.objects.values(*POLL_FIELDS).aget(pk=pk)
+        except Poll.DoesNotExist:
+            return HttpResponse(status=404)
+        return _json(PollGetSerializer(Poll(**poll)).data)
+
+    try:
+        poll = await Poll.objects.values(*POLL_FIELDS, *COUNTER_FIELDS).aget(pk=pk)
+    except Poll.DoesNotExist:
+        return HttpResponse(status=404)
+    shard_totals = await PollCounterShard.objects.filter(poll=pk).aaggregate(
+        **{field: Sum(field) for field in COUNTER_FIELDS})
+    poll.update(current_averages(poll, shard_totals))
+    poll['response_count'] += shard_totals['response_count'] or 0
+    return _json(PollGetSerializer(Poll(**poll)).data)
+
+
+@documented('get', responses={
+    200: MeetingWithTeacherGetSerializer,
+    404: 'not found'
+})
+@require_GET
+async def meeting_get(request, poll_pk):
+    try:
+        meeting = await Meeting.objects.select_related('subject', 'teacher', 'poll').aget(pk=poll_pk)
+    except Meeting.DoesNotExist:
+        return HttpResponse(status=404)
+
+    marks = [getattr(meeting.poll, field) for field in AVG_FIELDS] if meeting.poll else []
+    teacher = meeting.teacher
+    return _json({
+        'id': meeting.id,
+        'name': meeting.name,
+        'subject': meeting.subject_id,
+        'date': DateTimeField().to_representation(meeting.date),
+        'poll': meeting.poll_id,
+        'teacher': meeting.teacher_id,
+        'type': meeting.type,
+        'rating': sum(marks) / 5 if marks and all(marks) else 0,
+        'teacher_name': "{} {} {}".format(teacher.last_name, teacher.first_name, teacher.patronymic)
+        if teacher else None,
+        'subject_name': meeting.subject.name,
+    })
+
+
+def _request_data(request):
+    """Parsed JSON or form body of the request, None when the JSON does not parse."""
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+async def _poll_states(polls):
+    """Admission state of each poll, from memory unless the windows are stale."""
+    if poll_windows_stale(polls):
+        await sync_to_async(refresh_poll_windows)(polls)
+    return {poll: poll_state(poll) for poll in polls}
+
+
+@documented('post', request_body=PollResultSubmitSerializer, operation_description='send poll result',
+            responses={
+                201: 'created',
+                400: 'bad request',
+                403: 'poll is closed',
+                404: 'poll not found or closed',
+                503: 'the result was not saved in time'
+            })
+@csrf_exempt
+@require_POST
+async def poll_result_post(request, poll_pk):
+    state = (await _poll_states({poll_pk}))[poll_pk]
+    if state == UNKNOWN:
+        return _json({"detail": "Poll not found or closed."}, status=404)
+    if state == CLOSED:
+        return _json({"detail": "Poll is closed."}, status=403)
+
+    data = _request_data(request)
+    if data is None:
+        return _json({"detail": "JSON parse error."}, status=400)
+    serializer = PollResultSubmitSerializer(data=data)
+    if not serializer.is_valid():
+        return _json(serializer.errors, status=400)
+
+    validated_data = dict(serializer.validated_data, poll_id=poll_pk)
+    if settings.POLL_INGEST_BATCHING:
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(submit_poll_result(validated_data)),
+                                   settings.POLL_INGEST_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return _json({"detail": "Poll result was not saved in time, try again later."}, status=503)
+    else:
+        await sync_to_async(create_poll_results)([validated_data])
+    return _json("created", status=201)
+
+
+@documented('post', request_body=PollResultBulkSerializer.many_init(),
+            operation_description='send up to {} poll results for any polls, all of them are saved or none'
+                                  .format(MAX_BULK_POLL_RESULTS),
+            responses={
+                201: 'ids of the saved results in upload order',
+                400: 'bad request, errors holds one dict per item, empty for valid items'
+            })
+@csrf_exempt
+@require_POST
+async def poll_results_bulk_post(request):
+    """Saves a JSON list of poll results for any polls at once, either all of them or none.
+
+    Invalid uploads get a 400 with `errors`, one dict per item in upload order and empty for valid items.
+    """
+    data = _request_data(request)
+    if data is None:
+        return _json({"detail": "JSON parse error."}, status=400)
+    if not isinstance(data, list) or not 1 <= len(data) <= MAX_BULK_POLL_RESULTS:
+        return _json("bad request: expected a JSON list of 1 to {} poll results".format(MAX_BULK_POLL_RESULTS),
+                     status=400)
+
+    submissions = [PollResultBulkSerializer(data=item) for item in data]
+    valid = [serializer.is_valid() for serializer in submissions]
+    states = await _poll_states({serializer.validated_data['poll']
+                                 for serializer, is_valid in zip(submissions, valid) if is_valid})
+
+    errors = []
+    for serializer, is_valid in zip(submissions, valid):
+        if not is_valid:
+            errors.append(serializer.errors)
+        elif states[serializer.validated_data['poll']] == UNKNOWN:
+            errors.append({"poll": ["Poll not found or closed."]})
+        elif states[serializer.validated_data['poll']] == CLOSED:
+            errors.append({"poll": ["Poll is closed."]})
+        else:
+            errors.append({})
+    if any(errors):
+        return _json({"errors": errors}, status=400)
+
+    rows = [dict(serializer.validated_data, poll_id=serializer.validated_data['poll']) for serializer in submissions]
+    for row in rows:
+        del row['poll']
+    results = await sync_to_async(create_poll_results)(rows)
+    return _json({"created": [result.pk for result in results]}, status=201)
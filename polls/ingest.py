@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from .aggregates import create_poll_results
+
+logger = logging.getLogger(__name__)
+
+# validated submissions waiting for the next flush, with the future of each one
+_pending = []
+_condition = threading.Condition()
+_flusher = None
+
+
+def submit_poll_result(validated_data):
+    """Queues a validated poll result for the next batch.
+
+    Returns a future resolved with the saved PollResult once it has committed, or with the exception that kept
+    it from being saved. A future cancelled before its batch is flushed is dropped without saving its row.
+    """
+    global _flusher
+    future = Future()
+    with _condition:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_forever, name='poll-ingest', daemon=True)
+            _flusher.start()
+        _pending.append((validated_data, future))
+        if len(_pending) == 1 or len(_pending) >= settings.POLL_INGEST_BATCH_SIZE:
+            _condition.notify()
+    return future
+
+
+def _next_batch():
+    with _condition:
+        while not _pending:
+            _condition.wait()
+        deadline = time.monotonic() + settings.POLL_INGEST_DELAY_MS / 1000
+        while len(_pending) < settings.POLL_INGEST_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _condition.wait(remaining)
+        batch = _pending[:settings.POLL_INGEST_BATCH_SIZE]
+        del _pending[:settings.POLL_INGEST_BATCH_SIZE]
+        return batch
+
+
+def _save(batch):
+    """Saves the batch in one transaction, or row by row once that rolls back so that a bad row fails only its future.
+
+    An error raised after the commit, by an on_commit hook, leaves the rows saved and is only logged.
+    """
+    committed = []
+    try:
+        with transaction.atomic():
+            # registered first so that it runs before the hooks of create_poll_results
+            transaction.on_commit(lambda: committed.append(True))
+            results = create_poll_results([validated_data for validated_data, future in batch])
+    except Exception as error:
+        if committed:
+            logger.exception('poll result batch of %s rows committed, but an on_commit hook failed', len(batch))
+        elif len(batch) == 1:
+            logger.exception('poll result failed')
+            batch[0][1].set_exception(error)
+            return
+        else:
+            logger.warning('poll result batch of %s rows failed, saving them one by one', len(batch))
+            for item in batch:
+                _save([item])
+            return
+    for (validated_data, future), result in zip(batch, results):
+        future.set_result(result)
+
+
+def _flush_forever():
+    while True:
+        batch = [(validated_data, future) for validated_data, future in _next_batch()
+                 if future.set_running_or_notify_cancel()]
+        try:
+            if batch:
+                _save(batch)
+        except Exception as error:
+            logger.exception('poll result batch of %s rows failed', len(batch))
+            for validated_data, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            close_old_connections()
@@ -0,0 +1,116 @@
+import statistics
+import threading
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from polls.aggregates import fold_poll_counters
+from polls.models import Poll, PollResult, PollCounterShard
+
+# settings each mode runs with
+MODES = {
+    'direct': {},
+    'batched': {'POLL_INGEST_BATCHING': True},
+    'sharded': {'POLL_COUNTER_SHARDS': 16},
+}
+# statements that update the running totals of a poll, the ones waiting for its hot row
+COUNTER_UPDATES = ('UPDATE "polls_poll" ', 'UPDATE "polls_pollcountershard" ')
+
+
+def percentile(values, fraction):
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ('Measure poll result submission throughput and latency under a burst of concurrent students, '
+            'the results go to a temporary poll that is deleted afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50, help='concurrent submitters')
+        parser.add_argument('--submissions', type=int, default=10, help='submissions per student')
+        parser.add_argument('--mode', choices=list(MODES) + ['all'], default='all')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='start the submissions at this many per second in total instead of all at once, '
+                                 'latencies then count from the scheduled start')
+
+    def handle(self, *args, **options):
+        modes = list(MODES) if options['mode'] == 'all' else [options['mode']]
+        for mode in modes:
+            poll = Poll.objects.create(closes_at=timezone.now() + timedelta(hours=1))
+            try:
+                with override_settings(**MODES[mode]):
+                    elapsed, latencies, counter_waits, statuses = self.burst(poll, options['students'],
+                                                                             options['submissions'], options['rate'])
+                # the folder thread may be folding the poll right now, which makes fold_poll_counters skip it
+                while PollCounterShard.objects.filter(poll=poll, response_count__gt=0).exists():
+                    fold_poll_counters([poll.pk])
+                saved = PollResult.objects.filter(poll=poll).count()
+                poll.refresh_from_db()
+            finally:
+                poll.delete()
+
+            failed = [status for status in statuses if status != 201]
+            if len(latencies) == 0:
+                self.stdout.write(self.style.ERROR('{}: every submission failed, e.g. {}'.format(mode, failed[0])))
+                continue
+            latencies.sort()
+            counter_waits.sort()
+            # batched submissions update the totals in the flusher thread, which is not measured
+            counter_wait = 'counter update p50 {:.1f}ms p99 {:.1f}ms, '.format(
+                statistics.median(counter_waits) * 1000, percentile(counter_waits, 0.99) * 1000) \
+                if counter_waits else ''
+            self.stdout.write('{}: {} submissions in {:.2f}s, {:.0f}/s, latency p50 {:.1f}ms p99 {:.1f}ms, {}'
+                              'saved {} counted {} failed {}'.format(
+                                  mode, len(statuses), elapsed, len(latencies) / elapsed,
+                                  statistics.median(latencies) * 1000, percentile(latencies, 0.99) * 1000,
+                                  counter_wait, saved, poll.response_count, len(failed)))
+
+    def burst(self, poll, students, submissions, rate=None):
+        latencies = []
+        counter_waits = []
+        statuses = []
+        barrier = threading.Barrier(students + 1)
+
+        def time_counter_updates(execute, sql, params, many, context):
+            if not sql.startswith(COUNTER_UPDATES):
+                return execute(sql, params, many, context)
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                counter_waits.append(time.perf_counter() - started)
+
+        def submit(student):
+            client = Client()
+            barrier.wait()
+            try:
+                for number in range(submissions):
+                    started = time.perf_counter()
+                    if rate:
+                        started = burst_started + (number * students + student) / rate
+                        time.sleep(max(started - time.perf_counter(), 0))
+                    try:
+                        with connection.execute_wrapper(time_counter_updates):
+                            response = client.post('/polls/noauth/{}/pollresults'.format(poll.pk), {
+                                'student_first_name': 'Студент', 'student_second_name': str(student),
+                                'student_patronymic': str(number), 'question1': 5, 'question2': 4, 'question3': 3,
+                                'question4': 2, 'question5': 1 + (student + number) % 5,
+                            }, content_type='application/json')
+                    except Exception as error:
+                        statuses.append(type(error).__name__)
+                        continue
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(student,)) for student in range(students)]
+        for thread in threads:
+            thread.start()
+        burst_started = time.perf_counter()
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - burst_started, latencies, counter_waits, statuses
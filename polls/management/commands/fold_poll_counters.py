@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from polls.aggregates import fold_poll_counters
+
+
+class Command(BaseCommand):
+    help = 'Move the counter shards of every poll into its totals, averages and rating rollups'
+
+    def handle(self, *args, **options):
+        folded = fold_poll_counters()
+        self.stdout.write(self.style.SUCCESS('{} polls folded'.format(len(folded))))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from admin_api.models import University
+from admin_api.rollups import rebuild_rating_rollups, rebuild_daily_ratings
+from admin_api.versions import bump_versions
+from polls.aggregates import rebuild_poll_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute running totals and averages of every poll from its results, then the rating and daily rollups'
+
+    def handle(self, *args, **options):
+        rebuild_poll_aggregates()
+        rebuild_rating_rollups()
+        rebuild_daily_ratings()
+        bump_versions(University.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS('poll aggregates rebuilt'))
@@ -8,6 +8,14 @@ class Poll(models.Model):
     question3_avg_mark = models.FloatField(null=True)
     question4_avg_mark = models.FloatField(null=True)
     question5_avg_mark = models.FloatField(null=True)
+    response_count = models.IntegerField(default=0)
+    question1_sum = models.IntegerField(default=0)
+    question2_sum = models.IntegerField(default=0)
+    question3_sum = models.IntegerField(default=0)
+    question4_sum = models.IntegerField(default=0)
+    question5_sum = models.IntegerField(default=0)
+    opens_at = models.DateTimeField(null=True, blank=True)
+    closes_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
 
 class PollResult(models.Model):
@@ -22,3 +30,20 @@ class PollResult(models.Model):
     question5 = models.IntegerField(null=False, default=5)
     comment1 = models.CharField(max_length=1024, null=True)
     comment2 = models.CharField(max_length=1024, null=True)
+
+
+class PollCounterShard(models.Model):
+    """Part of the running totals of a poll, submissions add to a random shard and folding moves them to the poll."""
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE)
+    shard = models.IntegerField()
+    response_count = models.IntegerField(default=0)
+    question1_sum = models.IntegerField(default=0)
+    question2_sum = models.IntegerField(default=0)
+    question3_sum = models.IntegerField(default=0)
+    question4_sum = models.IntegerField(default=0)
+    question5_sum = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['poll', 'shard'], name='unique_poll_counter_shard'),
+        ]
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from admin_api.models import Meeting
+from .admission import invalidate_poll_windows
+from .models import Poll
+
+WINDOW_FIELDS = {'opens_at', 'closes_at'}
+
+
+@receiver(post_save, sender=Poll)
+@receiver(post_delete, sender=Poll)
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+def reload_poll_windows(sender, instance, update_fields=None, **kwargs):
+    # aggregate saves of polls name their fields and leave the windows alone
+    if sender is Poll and update_fields is not None and not WINDOW_FIELDS & set(update_fields):
+        return
+    invalidate_poll_windows()
@@ -1,3 +1,321 @@
-from django.test import TestCase
+import datetime
+import json
+import threading
+from concurrent.futures import Future
+from unittest import mock, skipIf
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from admin_api.models import University, Subject, Teacher, Meeting, SubjectRating
+from .aggregates import create_poll_results, fold_dirty_polls, fold_poll_counters, rebuild_poll_aggregates
+from .ingest import _save
+from .models import Poll, PollResult, PollCounterShard
+from .serializers import PollGetSerializer
 
-# Create your tests here.
+
+@override_settings(POLL_COUNTER_SHARDS=0)
+class PollResultAggregateTest(TestCase):
+    marks = [[5, 4, 3, 2, 1], [3, 3, 3, 3, 3], [4, 5, 1, 2, 2]]
+
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        teacher = Teacher.objects.create(username='teacher', university=university)
+        self.subject = Subject.objects.create(university=university, name='Дисциплина')
+        self.poll = Poll.objects.create()
+        Meeting.objects.create(subject=self.subject, teacher=teacher, date=timezone.now(), poll=self.poll)
+
+    def submit(self, marks):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/polls/noauth/{}/pollresults'.format(self.poll.pk), {
+                'student_first_name': 'Студент', 'student_second_name': '-', 'student_patronymic': '-',
+                **{'question{}'.format(number): mark for number, mark in enumerate(marks, 1)},
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_running_sums_and_averages(self):
+        for marks in self.marks:
+            self.submit(marks)
+
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.response_count, 3)
+        self.assertEqual([self.poll.question1_sum, self.poll.question5_sum], [12, 6])
+        self.assertAlmostEqual(self.poll.question1_avg_mark, 4)
+        self.assertAlmostEqual(self.poll.question3_avg_mark, 7 / 3)
+        self.assertAlmostEqual(self.poll.question5_avg_mark, 2)
+        rollup = SubjectRating.objects.get(subject=self.subject)
+        self.assertEqual(rollup.polls_count, 1)
+        self.assertAlmostEqual(rollup.rating, (4 + 4 + 7 / 3 + 7 / 3 + 2) / 5)
+
+    def test_failed_rollup_updates_are_rebuilt(self):
+        with mock.patch('admin_api.rollups._add_to_rollups', side_effect=DatabaseError('deadlock detected')), \
+                self.assertLogs('admin_api.rollups', 'ERROR'):
+            self.submit(self.marks[0])
+
+        rollup = SubjectRating.objects.get(subject=self.subject)
+        self.assertEqual(rollup.polls_count, 1)
+        self.assertAlmostEqual(rollup.rating, 3)
+
+    def test_running_sums_match_rebuild(self):
+        for marks in self.marks:
+            self.submit(marks)
+        self.poll.refresh_from_db()
+        running = [self.poll.response_count, self.poll.question2_sum, self.poll.question2_avg_mark]
+
+        Poll.objects.filter(pk=self.poll.pk).update(response_count=0, question2_sum=0, question2_avg_mark=None)
+        rebuild_poll_aggregates([self.poll.pk])
+        self.poll.refresh_from_db()
+        self.assertEqual([self.poll.response_count, self.poll.question2_sum, self.poll.question2_avg_mark], running)
+
+
+@override_settings(POLL_COUNTER_SHARDS=2, POLL_COUNTER_FOLD_SECONDS=3600)
+class ShardedPollResultAggregateTest(PollResultAggregateTest):
+    def submit(self, marks):
+        super().submit(marks)
+        with self.captureOnCommitCallbacks(execute=True):
+            fold_dirty_polls()
+
+    def test_shards_count_before_the_fold(self):
+        PollResultAggregateTest.submit(self, self.marks[0])
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.response_count, 0)
+        self.assertEqual(self.client.get('/polls/noauth/{}/'.format(self.poll.pk)).json()['response_count'], 1)
+
+        self.assertEqual(fold_dirty_polls(), [self.poll.pk])
+        self.assertEqual(fold_dirty_polls(), [])
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.response_count, 1)
+
+
+@override_settings(POLL_COUNTER_SHARDS=0)
+class PollIngestTest(TestCase):
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        subject = Subject.objects.create(university=university, name='Дисциплина')
+        self.poll = Poll.objects.create()
+        Meeting.objects.create(subject=subject, date=timezone.now(), poll=self.poll)
+
+    def row(self, **marks):
+        return {'poll_id': self.poll.pk, 'student_first_name': 'Студент', 'student_second_name': '-',
+                'student_patronymic': '-', **marks}
+
+    def test_a_bad_row_fails_only_its_own_future(self):
+        batch = [(self.row(question1=4), Future()), (self.row(question1=None), Future()),
+                 (self.row(question1=2), Future())]
+        with self.assertLogs('polls.ingest', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            _save(batch)
+
+        self.assertIsInstance(batch[1][1].exception(), IntegrityError)
+        saved = [batch[0][1].result().pk, batch[2][1].result().pk]
+        self.assertEqual(sorted(PollResult.objects.values_list('pk', flat=True)), sorted(saved))
+        self.poll.refresh_from_db()
+        self.assertEqual((self.poll.response_count, self.poll.question1_sum), (2, 6))
+
+    @override_settings(POLL_INGEST_BATCHING=True, POLL_INGEST_TIMEOUT_SECONDS=0.01)
+    def test_unflushed_submissions_time_out(self):
+        with mock.patch('polls.async_views.submit_poll_result', return_value=Future()) as submit:
+            response = self.client.post('/polls/noauth/{}/pollresults'.format(self.poll.pk), {
+                'student_first_name': 'Студент', 'student_second_name': '-', 'student_patronymic': '-',
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(submit.return_value.cancelled())
+
+
+@override_settings(POLL_COUNTER_SHARDS=0)
+class PollResultBulkTest(TestCase):
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        subject = Subject.objects.create(university=university, name='Дисциплина')
+        self.polls = [Poll.objects.create(), Poll.objects.create()]
+        for poll in self.polls:
+            Meeting.objects.create(subject=subject, date=timezone.now(), poll=poll)
+
+    def item(self, poll, **fields):
+        return {'poll': poll, 'student_first_name': 'Студент', 'student_second_name': '-',
+                'student_patronymic': '-', **fields}
+
+    def upload(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/polls/noauth/pollresults/bulk', data, content_type='application/json')
+
+    def test_results_for_several_polls_are_saved_together(self):
+        response = self.upload([self.item(self.polls[0].pk, question1=3), self.item(self.polls[1].pk),
+                                self.item(self.polls[0].pk, question1=4)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'],
+                         list(PollResult.objects.order_by('pk').values_list('pk', flat=True)))
+        self.polls[0].refresh_from_db()
+        self.assertEqual((self.polls[0].response_count, self.polls[0].question1_avg_mark), (2, 3.5))
+
+    def test_one_bad_item_rejects_the_whole_upload(self):
+        future = Poll.objects.create(opens_at=timezone.now() + datetime.timedelta(days=1),
+                                     closes_at=timezone.now() + datetime.timedelta(days=2))
+        response = self.upload([self.item(self.polls[0].pk), self.item(self.polls[0].pk, question1='five'),
+                                self.item(self.polls[1].pk + 1000), self.item(future.pk)])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ['question1'])
+        self.assertEqual(errors[2:], [{'poll': ['Poll not found or closed.']}, {'poll': ['Poll is closed.']}])
+        self.assertFalse(PollResult.objects.exists())
+
+    def test_uploads_must_be_lists_of_limited_size(self):
+        self.assertEqual(self.upload([]).status_code, 400)
+        self.assertEqual(self.upload(self.item(self.polls[0].pk)).status_code, 400)
+        self.assertEqual(self.client.post('/polls/noauth/pollresults/bulk', '[{',
+                                          content_type='application/json').status_code, 400)
+        with mock.patch('polls.async_views.MAX_BULK_POLL_RESULTS', 2):
+            self.assertEqual(self.upload([self.item(self.polls[0].pk)] * 3).status_code, 400)
+        self.assertFalse(PollResult.objects.exists())
+
+
+class PollAdmissionTest(TestCase):
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        self.subject = Subject.objects.create(university=university, name='Дисциплина')
+
+    def poll(self, meeting_date=None, **window):
+        poll = Poll.objects.create(**window)
+        if meeting_date is not None:
+            Meeting.objects.create(subject=self.subject, date=meeting_date, poll=poll)
+        return poll
+
+    def submit(self, poll_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/polls/noauth/{}/pollresults'.format(poll_id), {
+                'student_first_name': 'Студент', 'student_second_name': '-', 'student_patronymic': '-',
+            }, content_type='application/json')
+
+    def test_polls_are_open_for_some_hours_after_their_meeting(self):
+        now = timezone.now()
+        self.assertEqual(self.submit(self.poll(now - datetime.timedelta(hours=1)).pk).status_code, 201)
+        self.assertEqual(self.submit(self.poll(now - datetime.timedelta(days=4)).pk).status_code, 404)
+        self.assertEqual(self.submit(self.poll(now + datetime.timedelta(hours=1)).pk).status_code, 403)
+
+    def test_explicit_windows_win_over_the_meeting(self):
+        now = timezone.now()
+        self.assertEqual(self.submit(self.poll(now, closes_at=now - datetime.timedelta(minutes=1)).pk).status_code,
+                         404)
+        self.assertEqual(self.submit(self.poll(now, opens_at=now + datetime.timedelta(hours=1)).pk).status_code,
+                         403)
+        self.assertEqual(self.submit(self.poll(now - datetime.timedelta(days=4),
+                                               closes_at=now + datetime.timedelta(hours=1)).pk).status_code, 201)
+
+    def test_polls_without_meeting_or_end_are_closed(self):
+        self.assertEqual(self.submit(self.poll().pk).status_code, 404)
+        self.assertEqual(self.submit(self.poll(closes_at=timezone.now() + datetime.timedelta(hours=1)).pk)
+                         .status_code, 201)
+        self.assertEqual(self.submit(1000000).status_code, 404)
+
+    def test_poll_get_renders_the_poll_serializer_fields(self):
+        poll = self.poll(timezone.now(), closes_at=timezone.now() + datetime.timedelta(hours=1))
+        response = self.client.get('/polls/noauth/{}/'.format(poll.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), PollGetSerializer(poll).data)
+        with override_settings(POLL_COUNTER_SHARDS=2):
+            self.assertEqual(self.client.get('/polls/noauth/{}/'.format(poll.pk)).json(), PollGetSerializer(poll).data)
+
+
+class AsyncViewSchemaTest(TestCase):
+    def test_async_views_are_documented(self):
+        response = self.client.get('/swagger/?format=openapi')
+        self.assertEqual(response.status_code, 200)
+        paths = json.loads(response.content)['paths']
+        self.assertEqual(paths['/polls/noauth/{id}/']['get']['responses']['200']['schema']['$ref'],
+                         '#/definitions/PollGet')
+        self.assertIn('get', paths['/polls/noauth/meeting/{poll_pk}/'])
+        self.assertIn('post', paths['/polls/noauth/pollresults/bulk'])
+        self.assertEqual(set(paths['/polls/noauth/{poll_pk}/pollresults']['post']['responses']),
+                         {'201', '400', '403', '404', '503'})
+
+
+@skipIf(connection.vendor == 'sqlite', 'sqlite serializes writers, there is nothing to race')
+@override_settings(POLL_COUNTER_SHARDS=0)
+class ConcurrentPollResultTest(TransactionTestCase):
+    students = 16
+    submissions_per_student = 5
+
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        teacher = Teacher.objects.create(username='teacher', university=university)
+        self.subject = Subject.objects.create(university=university, name='Дисциплина')
+        self.poll = Poll.objects.create()
+        Meeting.objects.create(subject=self.subject, teacher=teacher, date=timezone.now(), poll=self.poll)
+
+    def settle(self):
+        pass
+
+    def submit(self, barrier, student):
+        client = APIClient()
+        barrier.wait()
+        try:
+            for _ in range(self.submissions_per_student):
+                response = client.post('/polls/noauth/{}/pollresults'.format(self.poll.pk), {
+                    'student_first_name': 'Студент', 'student_second_name': str(student),
+                    'student_patronymic': '-', 'question1': 5, 'question2': 4, 'question3': 3,
+                    'question4': 2, 'question5': 1 + student % 5,
+                }, format='json')
+                self.statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_no_lost_votes(self):
+        self.statuses = []
+        barrier = threading.Barrier(self.students)
+        threads = [threading.Thread(target=self.submit, args=(barrier, student)) for student in range(self.students)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.settle()
+
+        total = self.students * self.submissions_per_student
+        question5_sum = sum(1 + student % 5 for student in range(self.students)) * self.submissions_per_student
+        self.assertEqual(self.statuses, [201] * total)
+        self.poll.refresh_from_db()
+        self.assertEqual(PollResult.objects.filter(poll=self.poll).count(), total)
+        self.assertEqual(self.poll.response_count, total)
+        self.assertEqual(self.poll.question1_sum, 5 * total)
+        self.assertEqual(self.poll.question5_sum, question5_sum)
+        self.assertAlmostEqual(self.poll.question4_avg_mark, 2)
+        self.assertAlmostEqual(self.poll.question5_avg_mark, question5_sum / total)
+
+        rollup = SubjectRating.objects.get(subject=self.subject)
+        self.assertEqual(rollup.polls_count, 1)
+        self.assertAlmostEqual(rollup.rating, (5 + 4 + 3 + 2 + question5_sum / total) / 5)
+
+
+@override_settings(POLL_COUNTER_SHARDS=4, POLL_COUNTER_FOLD_SECONDS=3600)
+class ShardedConcurrentPollResultTest(ConcurrentPollResultTest):
+    def settle(self):
+        # the folder thread may be folding the poll right now, which makes fold_poll_counters skip it
+        while PollCounterShard.objects.filter(response_count__gt=0).exists():
+            fold_poll_counters()
+
+
+@override_settings(POLL_COUNTER_SHARDS=0)
+class PollIngestCommitTest(TransactionTestCase):
+    # on_commit hooks only run on a real commit
+
+    def setUp(self):
+        university = University.objects.create(name='Университет', short_name='У')
+        subject = Subject.objects.create(university=university, name='Дисциплина')
+        self.poll = Poll.objects.create()
+        Meeting.objects.create(subject=subject, date=timezone.now(), poll=self.poll)
+
+    def test_a_failing_hook_does_not_save_the_batch_again(self):
+        def create_with_failing_hook(rows):
+            results = create_poll_results(rows)
+            transaction.on_commit(mock.Mock(side_effect=RuntimeError('hook failed')))
+            return results
+
+        batch = [({'poll_id': self.poll.pk, 'student_first_name': 'Студент', 'student_second_name': str(number),
+                   'student_patronymic': '-', 'question1': 4}, Future()) for number in range(2)]
+        with mock.patch('polls.ingest.create_poll_results', create_with_failing_hook), \
+                self.assertLogs('polls.ingest', 'ERROR'):
+            _save(batch)
+
+        saved = sorted(future.result().pk for validated_data, future in batch)
+        self.assertEqual(sorted(PollResult.objects.values_list('pk', flat=True)), saved)
+        self.poll.refresh_from_db()
+        self.assertEqual((self.poll.response_count, self.poll.question1_sum), (2, 8))
@@ -1,11 +1,12 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('', views.poll_crud),
     path('<int:pk>/', views.poll_detail),
     path('<int:poll_pk>/pollresults', views.poll_result_crud),
-    path('noauth/<int:pk>/', views.poll_get),
-    path('noauth/meeting/<int:poll_pk>/', views.meeting_get),
-    path('noauth/<int:poll_pk>/pollresults', views.poll_result_post)
+    path('noauth/<int:pk>/', async_views.poll_get),
+    path('noauth/meeting/<int:poll_pk>/', async_views.meeting_get),
+    path('noauth/<int:poll_pk>/pollresults', async_views.poll_result_post),
+    path('noauth/pollresults/bulk', async_views.poll_results_bulk_post)
 ]
\ No newline at end of file
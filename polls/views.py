@@ -1,4 +1,3 @@
-from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -6,14 +5,14 @@ from rest_framework import status
 from rest_framework.decorators import authentication_classes, permission_classes
 from rest_framework.authentication import SessionAuthentication
 from admin_api.authentication import BearerTokenAuthentication
+from admin_api.pagination import paginated_response, pagination_parameters
 from rest_framework.permissions import IsAuthenticated
 from .models import Poll, PollResult
-from admin_api.models import Meeting
-from .serializers import PollSerializer, PollResultSerializer, PollGetSerializer, MeetingWithTeacherGetSerializer
+from .serializers import PollSerializer, PollResultSerializer, PollGetSerializer
 
 
 @swagger_auto_schema(method='post', request_body=PollSerializer)
-@swagger_auto_schema(method='get',
+@swagger_auto_schema(method='get', manual_parameters=pagination_parameters,
                      responses={
                          200: PollGetSerializer.many_init(),
                          400: 'bad request'
@@ -31,43 +30,7 @@ def poll_crud(request):
 
     elif request.method == 'GET':
         data = Poll.objects.all()
-        serializer = PollGetSerializer(data, many=True)
-
-        return Response(serializer.data)
-
-
-@swagger_auto_schema(method='get',
-                     responses={
-                         200: PollGetSerializer,
-                         400: 'bad request'
-                     })
-@api_view(['GET'])
-def poll_get(request, pk):
-    try:
-        poll = Poll.objects.get(pk=pk)
-    except Poll.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
-
-    if request.method == 'GET':
-        serializer = PollGetSerializer(poll)
-        return Response(serializer.data)
-
-
-@swagger_auto_schema(method='get',
-                     responses={
-                         200: MeetingWithTeacherGetSerializer,
-                         400: 'bad request'
-                     })
-@api_view(['GET'])
-def meeting_get(request, poll_pk):
-    try:
-        meeting = Meeting.objects.get(pk=poll_pk)
-    except Meeting.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
-
-    if request.method == 'GET':
-        serializer = MeetingWithTeacherGetSerializer(meeting)
-        return Response(serializer.data)
+        return paginated_response(request, data, PollGetSerializer)
 
 
 @swagger_auto_schema(method='put', request_body=PollSerializer,
@@ -101,6 +64,7 @@ def poll_detail(request, pk):
 
 
 @swagger_auto_schema(method='get', operation_description="get all results from poll",
+                     manual_parameters=pagination_parameters,
                      responses={
                          200: 'result',
                          400: 'bad request'
@@ -118,28 +82,4 @@ def poll_result_crud(request, poll_pk):
 
     if request.method == 'GET':
         data = PollResult.objects.filter(poll=poll)
-        serializer = PollResultSerializer(data, many=True)
-
-        return Response(serializer.data)
-
-
-@swagger_auto_schema(method='post', request_body=PollResultSerializer, operation_description='send poll result',
-                     responses={
-                         201: 'created',
-                         404: 'poll not found'
-                     })
-@api_view(['POST'])
-def poll_result_post(request, poll_pk):
-    try:
-        poll = Poll.objects.get(pk=poll_pk)
-    except Poll.DoesNotExist:
-        return Response({"detail": "Poll not found."}, status=status.HTTP_404_NOT_FOUND)
-    data = request.data
-    data['poll'] = poll.pk
-    if request.method == 'POST':
-
-        serializer = PollResultSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response("created", status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return paginated_response(request, data, PollResultSerializer)
@@ -3,6 +3,10 @@ ASGI config for studentvoiceapi project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The public poll endpoints (polls/noauth/...) are native async views, serve them with an ASGI server,
+e.g. ``uvicorn studentvoiceapi.asgi:application``, best together with POLL_INGEST_BATCHING=1. The rest of
+the API is synchronous and can stay on WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
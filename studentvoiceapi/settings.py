@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'admin_api',
     'polls',
+    'excel',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
@@ -117,6 +118,80 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Cached ratings are keyed by the data version of their university, so a committed change reaches every worker
+# at once. They are kept per process by default, set RATING_CACHE_BACKEND and RATING_CACHE_LOCATION to a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache, redis://host:6379) to share them between workers.
+
+RATING_CACHE_BACKEND = getenv('RATING_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratings': {
+        'BACKEND': RATING_CACHE_BACKEND,
+        'LOCATION': getenv('RATING_CACHE_LOCATION', 'ratings'),
+        'TIMEOUT': 24 * 60 * 60,
+    },
+}
+
+if RATING_CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['ratings']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
+
+# Excel export jobs
+# Finished reports are kept in EXPORT_ROOT for EXPORT_TTL seconds, EXPORT_WORKERS threads per process build them.
+
+EXPORT_ROOT = getenv('EXPORT_ROOT', str(BASE_DIR / 'exports'))
+EXPORT_WORKERS = int(getenv('EXPORT_WORKERS', '2'))
+EXPORT_TTL = int(getenv('EXPORT_TTL', str(60 * 60)))
+
+# Generated reports are cached by the data version they were built from, reports larger than
+# REPORT_CACHE_MAX_SIZE bytes are always rebuilt.
+
+REPORT_CACHE_MAX_SIZE = int(getenv('REPORT_CACHE_MAX_SIZE', str(10 * 1024 * 1024)))
+
+CACHES['reports'] = {
+    'BACKEND': getenv('REPORT_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': getenv('REPORT_CACHE_LOCATION', str(Path(EXPORT_ROOT) / 'cache')),
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+
+# Poll result ingestion
+# With POLL_INGEST_BATCHING=1 submissions are buffered per process and written together once
+# POLL_INGEST_BATCH_SIZE of them are waiting or POLL_INGEST_DELAY_MS after the first one, each request
+# still returns only after its batch has committed. A failed batch is retried row by row, so a bad row fails
+# only its own request. Requests still waiting after POLL_INGEST_TIMEOUT_SECONDS get a 503, their row is dropped
+# unless its batch has already started.
+
+POLL_INGEST_BATCHING = getenv('POLL_INGEST_BATCHING', '0') == '1'
+POLL_INGEST_BATCH_SIZE = int(getenv('POLL_INGEST_BATCH_SIZE', '200'))
+POLL_INGEST_DELAY_MS = int(getenv('POLL_INGEST_DELAY_MS', '20'))
+POLL_INGEST_TIMEOUT_SECONDS = float(getenv('POLL_INGEST_TIMEOUT_SECONDS', '10'))
+
+# With POLL_COUNTER_SHARDS above 0 submissions add to one of that many counter rows per poll instead of the poll
+# row itself. A thread in each process folds the shards of the polls it wrote to into the poll totals, averages
+# and rating rollups every POLL_COUNTER_FOLD_SECONDS; until then only the public poll endpoint counts them.
+# Shards of a process that exits before its next fold wait for the next submission to the poll, run the
+# fold_poll_counters command periodically (e.g. every minute from cron) to fold those too.
+
+POLL_COUNTER_SHARDS = int(getenv('POLL_COUNTER_SHARDS', '0'))
+POLL_COUNTER_FOLD_SECONDS = float(getenv('POLL_COUNTER_FOLD_SECONDS', '5'))
+
+# Polls accept submissions from their opens_at to their closes_at, by default from the date of their meeting
+# for POLL_OPEN_HOURS; polls with neither a meeting nor a closes_at accept none. Each process keeps the windows
+# of open and upcoming polls in memory, reloads them every POLL_WINDOWS_TTL seconds and, for a poll it does not
+# know, at most every POLL_WINDOWS_MISS_SECONDS. Saving a poll or meeting reloads them only in the process that
+# saved it, other processes apply a changed window up to POLL_WINDOWS_TTL seconds late.
+
+POLL_OPEN_HOURS = int(getenv('POLL_OPEN_HOURS', '72'))
+POLL_WINDOWS_TTL = float(getenv('POLL_WINDOWS_TTL', '60'))
+POLL_WINDOWS_MISS_SECONDS = float(getenv('POLL_WINDOWS_MISS_SECONDS', '5'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
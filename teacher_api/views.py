@@ -7,6 +7,9 @@ from admin_api.models import Meeting, Teacher, Subject
 from admin_api.serializers import MeetingGetSerializer, TeacherGetSerializer, SubjectGetSerializer
 from rest_framework.response import Response
 from admin_api.serializers import MeetingSerializer
+from admin_api.pagination import paginated_response, pagination_parameters
+from admin_api.search import search_filter
+from admin_api.fieldsets import requested_fieldset, fieldset_parameters
 from polls.serializers import MeetingWithTeacherGetSerializer
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
@@ -32,7 +35,7 @@ from polls.models import PollResult
                       type=openapi.TYPE_STRING),
     openapi.Parameter('search', openapi.IN_QUERY, 'field for searching by name', required=False,
                       type=openapi.TYPE_STRING)
-], responses={
+] + pagination_parameters + fieldset_parameters, responses={
     200: MeetingGetSerializer.many_init(),
     400: 'bad request'
 })
@@ -55,10 +58,9 @@ def meeting_crud(request):
 
         search = request.GET.get('search', None)
         if search:
-            search = search.lower()
-            data = data.filter(name__icontains=search)
-        serializer = MeetingGetSerializer(data, many=True)
-        return Response(serializer.data)
+            data = search_filter(data, search)
+        return paginated_response(request, data, MeetingGetSerializer, ordering=('date', 'id'),
+                                  **requested_fieldset(request))
 
     elif request.method == 'POST':
         request.data['teacher'] = current_user.id
@@ -109,7 +111,7 @@ def meeting_detail(request, pk):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: TeacherGetSerializer,
     404: 'not found'
 }, operation_description='get info about current logged in teacher')
@@ -122,11 +124,11 @@ def teacher_me(request):
     except Teacher.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    serializer = TeacherGetSerializer(teacher)
+    serializer = TeacherGetSerializer(teacher, **requested_fieldset(request))
     return Response(serializer.data)
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: SubjectGetSerializer,
     404: 'not found'
 }, operation_description='get info about current logged in teacher\'s subject by id')
@@ -139,11 +141,11 @@ def subject_detail(request, pk):
     except Subject.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    serializer = SubjectGetSerializer(subject)
+    serializer = SubjectGetSerializer(subject, **requested_fieldset(request))
     return Response(serializer.data)
 
 
-@swagger_auto_schema(method='get', responses={
+@swagger_auto_schema(method='get', manual_parameters=fieldset_parameters, responses={
     200: SubjectGetSerializer,
     404: 'not found'
 }, operation_description='get info about current logged in teacher\'s subjects')
@@ -154,7 +156,7 @@ def get_teacher_subjects(request):
     current_user = request.user.id
     subjects = Subject.objects.filter(Q(lecture_teachers__in=[current_user])
                                       | Q(practice_teachers__in=[current_user])).distinct().all()
-    serializer = SubjectGetSerializer(subjects, many=True)
+    serializer = SubjectGetSerializer(subjects, many=True, **requested_fieldset(request))
 
     return Response(serializer.data)
 